@@ -1,7 +1,10 @@
 from fastmcp.digital_twin.server import DigitalTwinServer
-import time
+import asyncio
 
-def main():
+# Maximum number of interactions in flight at once
+MAX_CONCURRENCY = 8
+
+async def main():
     # Create a digital twin with custom initial personality traits
     twin = DigitalTwinServer(
         name="Alice",
@@ -42,27 +45,33 @@ def main():
         }
     ]
     
-    # Process each interaction
-    for interaction in interactions:
+    # Process interactions concurrently, bounded by a semaphore
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    
+    async def process(interaction):
+        async with sem:
+            return await twin.aprocess_interaction(
+                prompt=interaction['prompt'],
+                context=interaction['context']
+            )
+    
+    responses = await asyncio.gather(*(process(i) for i in interactions))
+    
+    for interaction, response in zip(interactions, responses):
         print(f"\nUser: {interaction['prompt']}")
-        response = twin.process_interaction(
-            prompt=interaction['prompt'],
-            context=interaction['context']
-        )
         print(f"Digital Twin: {response}")
-        
-        # Get current personality state
-        personality = twin.get_personality()
-        print("\nCurrent Personality State:")
-        for trait, value in personality.items():
-            print(f"- {trait}: {value:.2f}")
-        
-        # Small delay between interactions
-        time.sleep(1)
     
-    # Run the MCP server
-    print("\nStarting Digital Twin MCP Server...")
-    twin.run()
+    # Get current personality state
+    personality = twin.personality.get_traits()
+    print("\nCurrent Personality State:")
+    for trait, value in personality.items():
+        print(f"- {trait}: {value:.2f}")
+    
+    return twin
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    twin = asyncio.run(main())
+    
+    # Run the MCP server outside the event loop used for the interactions
+    print("\nStarting Digital Twin MCP Server...")
+    twin.run() 
\ No newline at end of file
@@ -1,12 +1,43 @@
-from typing import Dict, List, Any, Optional, Tuple
-from datetime import datetime
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Deque, Dict, List, Any, Optional, Set, Tuple
+from datetime import datetime, timezone
 import logging
-from .response_generator import ResponseGenerator
+import time
+from .response_generator import ResponseGenerator, parse_sections
 from .memory import Memory
 from .personality import Personality
 
 logger = logging.getLogger(__name__)
 
+def _format_timestamp(entry: Dict[str, Any]) -> str:
+    """Format an entry's timestamp for display.
+    
+    Records created here store raw `timestamp_ns` integers and are only
+    converted to ISO format when rendered; other entries keep `timestamp`.
+    """
+    if "timestamp_ns" in entry:
+        return datetime.fromtimestamp(
+            entry["timestamp_ns"] / 1e9, tz=timezone.utc
+        ).isoformat()
+    return str(entry["timestamp"])
+
+@dataclass
+class InteractionRecord:
+    """A single recorded user interaction."""
+    __slots__ = (
+        "user_input", "response", "context", "relevant_memories",
+        "interaction_id", "timestamp_ns"
+    )
+    
+    user_input: str
+    response: str
+    context: Optional[Dict[str, Any]]
+    relevant_memories: List[Dict[str, Any]]
+    interaction_id: Optional[int]
+    timestamp_ns: int
+
 class DigitalTwinInteraction:
     """Handles interactions with the digital twin."""
     
@@ -29,7 +60,13 @@ class DigitalTwinInteraction:
         self.memory = memory
         self.personality = personality
         self.config = self.response_generator.config
-        self.interaction_history: List[Dict[str, Any]] = []
+        # Bounded so a long-lived server doesn't grow without limit; IDs come
+        # from a separate counter since deque indices shift once it is full
+        self.interaction_history: Deque[InteractionRecord] = deque(
+            maxlen=self.config.get("interaction", {}).get("max_history", 10_000)
+        )
+        self._next_id = 0
+        self._background_tasks: Set["asyncio.Task[Any]"] = set()
     
     async def simulate_response(
         self,
@@ -46,6 +83,10 @@ class DigitalTwinInteraction:
             Tuple of (response, metadata)
         """
         try:
+            # Reserve the ID up front so concurrent calls are numbered in order
+            interaction_id = self._next_id
+            self._next_id += 1
+            
             # Get relevant memories
             relevant_memories = await self.memory.get_relevant_memories(
                 user_input,
@@ -64,13 +105,14 @@ class DigitalTwinInteraction:
             )
             
             # Record interaction
-            interaction = {
-                "timestamp": datetime.utcnow().isoformat(),
-                "user_input": user_input,
-                "response": response,
-                "context": context,
-                "relevant_memories": relevant_memories
-            }
+            interaction = InteractionRecord(
+                user_input=user_input,
+                response=response,
+                context=context,
+                relevant_memories=relevant_memories,
+                interaction_id=interaction_id,
+                timestamp_ns=time.time_ns()
+            )
             self.interaction_history.append(interaction)
             
             # Update profile after interaction
@@ -79,14 +121,14 @@ class DigitalTwinInteraction:
             return response, {
                 "relevant_memories": relevant_memories,
                 "personality_traits": personality_traits,
-                "interaction_id": len(self.interaction_history) - 1
+                "interaction_id": interaction_id
             }
             
         except Exception as e:
             logger.error(f"Error in simulate_response: {e}")
             raise
     
-    async def update_profile(self, interaction: Dict[str, Any]) -> None:
+    async def update_profile(self, interaction: InteractionRecord) -> None:
         """Update the digital twin's profile based on interaction.
         
         Args:
@@ -101,35 +143,40 @@ class DigitalTwinInteraction:
             
             # Analyze interaction
             analysis = await self.response_generator.analyze_interaction(
-                interaction=f"User: {interaction['user_input']}\nAssistant: {interaction['response']}",
+                interaction=(
+                    f"User: {interaction.user_input}\n"
+                    f"Assistant: {interaction.response}"
+                ),
                 current_personality=current_personality,
                 current_knowledge=current_knowledge
             )
             
-            # Update personality
-            if "personality_updates" in analysis:
-                for update in analysis["personality_updates"]:
-                    await self.personality.process_update(update)
-            
-            # Update memory
-            if "knowledge_updates" in analysis:
-                for update in analysis["knowledge_updates"]:
-                    await self.memory.add_memory(
-                        content=update,
-                        memory_type="semantic",
-                        metadata={"source": "interaction_analysis"}
-                    )
-            
-            if "memory_formation" in analysis:
-                for memory in analysis["memory_formation"]:
-                    await self.memory.add_memory(
-                        content=memory,
-                        memory_type="episodic",
-                        metadata={
-                            "source": "interaction_analysis",
-                            "interaction_id": len(self.interaction_history) - 1
-                        }
-                    )
+            # Apply personality and memory updates concurrently; none of
+            # them depend on each other
+            updates = [
+                self.personality.process_update(update)
+                for update in analysis.get("personality_updates", [])
+            ]
+            updates.extend(
+                self.memory.add_memory(
+                    content=update,
+                    memory_type="semantic",
+                    metadata={"source": "interaction_analysis"}
+                )
+                for update in analysis.get("knowledge_updates", [])
+            )
+            updates.extend(
+                self.memory.add_memory(
+                    content=memory,
+                    memory_type="episodic",
+                    metadata={
+                        "source": "interaction_analysis",
+                        "interaction_id": interaction.interaction_id
+                    }
+                )
+                for memory in analysis.get("memory_formation", [])
+            )
+            await asyncio.gather(*updates)
             
         except Exception as e:
             logger.error(f"Error in update_profile: {e}")
@@ -150,15 +197,14 @@ class DigitalTwinInteraction:
             Dictionary containing reflection insights
         """
         try:
-            # Get memories for reflection
+            # Snapshot the personality history on the loop thread, where
+            # evolve also runs, so the ring buffer is not read mid-update
+            personality_history = self.personality.get_evolution_history()
             memories = await self.memory.get_memories_for_reflection(
                 time_period=time_period,
                 limit=max_memories or self.config["memory"]["max_memories"]
             )
             
-            # Get personality evolution
-            personality_history = self.personality.get_evolution_history()
-            
             # Format reflection prompt
             reflection_prompt = f"""Reflection Period: {time_period or 'all time'}
 
@@ -199,16 +245,17 @@ COMMUNICATION_EVOLUTION:
             # Parse reflection into sections
             sections = self._parse_reflection_sections(reflection.text)
             
-            # Store reflection as a special memory
-            await self.memory.add_memory(
+            # Store reflection as a special memory in the background; the
+            # caller doesn't need to wait for the write
+            self._run_in_background(self.memory.add_memory(
                 content=reflection.text,
                 memory_type="semantic",
                 metadata={
                     "type": "reflection",
                     "time_period": time_period,
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp_ns": time.time_ns()
                 }
-            )
+            ))
             
             return sections
             
@@ -216,57 +263,72 @@ COMMUNICATION_EVOLUTION:
             logger.error(f"Error in reflect_chain: {e}")
             raise
     
+    def _run_in_background(self, coro: Awaitable[Any]) -> None:
+        """Run a coroutine as a tracked background task."""
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_task_done)
+    
+    def _on_background_task_done(self, task: "asyncio.Task[Any]") -> None:
+        """Forget a finished background task and log any failure."""
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error in background task: {task.exception()}")
+    
+    async def drain_background_tasks(self) -> None:
+        """Wait for pending background tasks, e.g. before shutdown."""
+        while self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+    
+    async def aclose(self) -> None:
+        """Finish background writes such as reflection memories."""
+        await self.drain_background_tasks()
+    
+    async def __aenter__(self) -> "DigitalTwinInteraction":
+        return self
+    
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+    
     def _format_personality_history(
         self,
         history: List[Dict[str, Any]]
     ) -> str:
         """Format personality history for reflection."""
-        formatted = []
-        for entry in history:
-            formatted.append(f"Time: {entry['timestamp']}")
-            for trait, value in entry['traits'].items():
-                formatted.append(f"- {trait}: {value:.2f}")
-            formatted.append("")
-        return "\n".join(formatted)
+        return "\n".join(
+            "\n".join((
+                f"Time: {_format_timestamp(entry)}",
+                *(
+                    f"- {trait}: {value:.2f}"
+                    for trait, value in entry['traits'].items()
+                ),
+                ""
+            ))
+            for entry in history
+        )
     
     def _format_memories_for_reflection(
         self,
         memories: List[Dict[str, Any]]
     ) -> str:
         """Format memories for reflection."""
-        formatted = []
-        for memory in memories:
-            formatted.append(f"Time: {memory['timestamp']}")
-            formatted.append(f"Type: {memory['type']}")
-            formatted.append(f"Content: {memory['content']}")
-            if memory.get('metadata'):
-                formatted.append(f"Metadata: {memory['metadata']}")
-            formatted.append("")
-        return "\n".join(formatted)
+        return "\n".join(
+            "\n".join((
+                f"Time: {_format_timestamp(memory)}",
+                f"Type: {memory['type']}",
+                f"Content: {memory['content']}",
+                *(
+                    (f"Metadata: {memory['metadata']}",)
+                    if memory.get('metadata') else ()
+                ),
+                ""
+            ))
+            for memory in memories
+        )
     
     def _parse_reflection_sections(self, reflection: str) -> Dict[str, List[str]]:
         """Parse reflection text into sections."""
-        sections = {}
-        current_section = None
-        current_items = []
-        
-        for line in reflection.split("\n"):
-            line = line.strip()
-            if not line:
-                continue
-            
-            if line.endswith(":"):
-                if current_section:
-                    sections[current_section] = current_items
-                current_section = line[:-1].lower()
-                current_items = []
-            elif line.startswith("- "):
-                current_items.append(line[2:])
-        
-        if current_section:
-            sections[current_section] = current_items
-        
-        return sections
+        return parse_sections(reflection)
     
     async def route_interaction(
         self,
@@ -310,10 +372,14 @@ COMMUNICATION_EVOLUTION:
                 
             elif interaction_type == "update":
                 # Update profile
-                await self.update_profile({
-                    "user_input": user_input,
-                    "context": context
-                })
+                await self.update_profile(InteractionRecord(
+                    user_input=user_input,
+                    response="",
+                    context=context,
+                    relevant_memories=[],
+                    interaction_id=None,
+                    timestamp_ns=time.time_ns()
+                ))
                 return {
                     "type": "update",
                     "status": "success"
@@ -1,17 +1,70 @@
+import asyncio
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional
+from typing import (
+    AsyncIterator, Awaitable, Callable, Dict, List, Any, Optional, TypeVar
+)
 from dataclasses import dataclass
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
-@dataclass
+T = TypeVar("T")
+
+# Background loop that synchronous wrappers run coroutines on, started lazily
+_SYNC_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_SYNC_LOOP_LOCK = threading.Lock()
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """Run a coroutine to completion from synchronous code.
+    
+    Every call shares one background event loop instead of starting a new
+    one with `asyncio.run`, so loop-bound state such as pooled connections
+    stays usable between calls.
+    """
+    global _SYNC_LOOP
+    with _SYNC_LOOP_LOCK:
+        if _SYNC_LOOP is None:
+            _SYNC_LOOP = asyncio.new_event_loop()
+            threading.Thread(
+                target=_SYNC_LOOP.run_forever, name="llm-sync-loop", daemon=True
+            ).start()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is _SYNC_LOOP:
+        raise RuntimeError("run_sync cannot be called from the loop it runs on")
+    return asyncio.run_coroutine_threadsafe(coro, _SYNC_LOOP).result()
+
+def get_loop_local(
+    cache: Dict[asyncio.AbstractEventLoop, T], factory: Callable[[], T]
+) -> T:
+    """Get the running loop's entry in `cache`, creating it with `factory`.
+    
+    Asyncio primitives and pooled connections are bound to the loop that
+    created them, so state shared across calls is kept per loop. Entries of
+    loops that have closed are dropped when a new one is added.
+    """
+    loop = asyncio.get_running_loop()
+    value = cache.get(loop)
+    if value is None:
+        for closed in [other for other in cache if other.is_closed()]:
+            del cache[closed]
+        value = cache[loop] = factory()
+    return value
+
+@dataclass(frozen=True)
 class LLMResponse:
     """Structured response from an LLM."""
+    __slots__ = ("text", "raw_response", "metadata")
+    
     text: str
     raw_response: Any
     metadata: Dict[str, Any]
 
 class LLMConfig(BaseModel):
     """Base configuration for LLM providers."""
+    model_config = ConfigDict(frozen=True)
+    
     provider: str
     model: str
     temperature: float = 0.7
@@ -19,12 +72,25 @@ class LLMConfig(BaseModel):
     top_p: float = 0.9
     top_k: int = 50
     repetition_penalty: float = 1.2
+    max_concurrency: int = 8  # Maximum in-flight requests per LLM instance
 
 class BaseLLM(ABC):
     """Abstract base class for LLM implementations."""
     
     def __init__(self, config: LLMConfig):
         self.config = config
+        self._sems: Dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+    
+    @property
+    def _sem(self) -> asyncio.Semaphore:
+        """Bounds concurrent provider calls so callers can gather freely.
+        
+        One semaphore per event loop, since a semaphore cannot be shared
+        across loops.
+        """
+        return get_loop_local(
+            self._sems, lambda: asyncio.Semaphore(self.config.max_concurrency)
+        )
     
     @abstractmethod
     async def generate(
@@ -36,12 +102,43 @@ class BaseLLM(ABC):
         """Generate a response from the LLM."""
         pass
     
+    async def generate_stream(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream a response from the LLM as text chunks.
+        
+        Providers that support streaming should override this; the default
+        awaits `generate` and yields the full text once.
+        """
+        response = await self.generate(prompt, context, **kwargs)
+        yield response.text
+    
     @abstractmethod
     async def embed(self, text: str) -> List[float]:
         """Generate embeddings for the given text."""
         pass
     
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for several texts.
+        
+        Providers with a batch endpoint should override this; the default
+        falls back to one `embed` call per text.
+        """
+        return [await self.embed(text) for text in texts]
+    
     @abstractmethod
     def get_token_count(self, text: str) -> int:
         """Get the number of tokens in the given text."""
-        pass 
\ No newline at end of file
+        pass
+    
+    async def aget_token_count(self, text: str) -> int:
+        """Get the number of tokens in the text without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get_token_count, text)
+    
+    def get_token_counts_batch(self, texts: List[str]) -> List[int]:
+        """Get the number of tokens in each of the given texts."""
+        return [self.get_token_count(text) for text in texts] 
\ No newline at end of file
@@ -1,26 +1,36 @@
-from typing import Dict, Type
+import importlib
+from typing import Dict, Type, Union
 from .base import BaseLLM, LLMConfig
-from .openai_llm import OpenAILLM
-# Import other LLM implementations as they are created
+
+# Registered LLM providers, keyed by lowercase provider name. Built-in
+# providers are "module:ClassName" paths (relative to this package) imported
+# on first use, so picking one provider doesn't pull in every other SDK.
+PROVIDERS: Dict[str, Union[str, Type[BaseLLM]]] = {
+    "openai": ".openai_llm:OpenAILLM",
+    # Add other providers as they are implemented
+}
 
 class LLMFactory:
     """Factory for creating LLM instances."""
     
-    _providers: Dict[str, Type[BaseLLM]] = {
-        "openai": OpenAILLM,
-        # Add other providers as they are implemented
-    }
-    
-    @classmethod
-    def create(cls, config: LLMConfig) -> BaseLLM:
+    @staticmethod
+    def create(config: LLMConfig) -> BaseLLM:
         """Create an LLM instance based on the configuration."""
         provider = config.provider.lower()
-        if provider not in cls._providers:
+        provider_class = PROVIDERS.get(provider)
+        if provider_class is None:
             raise ValueError(f"Unsupported LLM provider: {provider}")
         
-        return cls._providers[provider](config)
+        if isinstance(provider_class, str):
+            module_name, class_name = provider_class.split(":")
+            provider_class = getattr(
+                importlib.import_module(module_name, package=__package__), class_name
+            )
+            PROVIDERS[provider] = provider_class
+        
+        return provider_class(config)
     
-    @classmethod
-    def register_provider(cls, name: str, provider_class: Type[BaseLLM]) -> None:
-        """Register a new LLM provider."""
-        cls._providers[name.lower()] = provider_class 
\ No newline at end of file
+    @staticmethod
+    def register_provider(name: str, provider_class: Union[str, Type[BaseLLM]]) -> None:
+        """Register a new LLM provider class or lazy "module:ClassName" path."""
+        PROVIDERS[name.lower()] = provider_class 
\ No newline at end of file
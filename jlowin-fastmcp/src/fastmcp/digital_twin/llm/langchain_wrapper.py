@@ -1,8 +1,14 @@
-from typing import Any, Dict, List, Optional
+import asyncio
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional
 from langchain.llms.base import LLM
-from langchain.callbacks.manager import CallbackManagerForLLMRun
+from langchain.callbacks.manager import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
 from langchain.embeddings.base import Embeddings
-from .base import BaseLLM, LLMConfig
+from langchain.schema.output import GenerationChunk
+from .base import BaseLLM, LLMConfig, run_sync
 
 class DigitalTwinLLM(LLM):
     """LangChain wrapper for our LLM implementations."""
@@ -26,24 +32,103 @@ class DigitalTwinLLM(LLM):
         run_manager: Optional[CallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ) -> str:
-        """Call the LLM and return the response."""
-        response = self.llm.generate(prompt, **kwargs)
+        """Call the LLM and return the response.
+        
+        Drives the async `generate` on the shared background loop; async
+        callers should use `ainvoke`, which dispatches to `_acall`.
+        """
+        response = run_sync(self.llm.generate(prompt, **kwargs))
         return response.text
+    
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Asynchronously call the LLM and return the response."""
+        response = await self.llm.generate(prompt, **kwargs)
+        return response.text
+    
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        """Stream the LLM response as it is generated."""
+        async for token in self.llm.generate_stream(prompt, **kwargs):
+            if run_manager:
+                await run_manager.on_llm_new_token(token)
+            yield GenerationChunk(text=token)
 
 class DigitalTwinEmbeddings(Embeddings):
     """LangChain wrapper for our embedding implementations."""
     
     llm: BaseLLM
     
-    def __init__(self, llm: BaseLLM):
-        """Initialize with a BaseLLM implementation."""
+    def __init__(self, llm: BaseLLM, cache_size: int = 1024):
+        """Initialize with a BaseLLM implementation.
+        
+        Args:
+            llm: LLM used to compute embeddings
+            cache_size: Maximum number of query embeddings to keep cached
+        """
         super().__init__()
         self.llm = llm
+        self.cache_size = cache_size
+        # LRU cache of query embeddings, plus in-flight requests so concurrent
+        # lookups of the same query share one API call
+        self._query_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._pending_queries: Dict[str, "asyncio.Future[List[float]]"] = {}
+    
+    def _get_cached_query(self, text: str) -> Optional[List[float]]:
+        """Return a cached query embedding and mark it as recently used."""
+        embedding = self._query_cache.get(text)
+        if embedding is not None:
+            self._query_cache.move_to_end(text)
+        return embedding
+    
+    def _cache_query(self, text: str, embedding: List[float]) -> None:
+        """Cache a query embedding, evicting the least recently used entry."""
+        self._query_cache[text] = embedding
+        self._query_cache.move_to_end(text)
+        if len(self._query_cache) > self.cache_size:
+            self._query_cache.popitem(last=False)
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Embed a list of documents."""
-        return [self.llm.embed(text) for text in texts]
+        """Embed a list of documents in a single batch request."""
+        return run_sync(self.llm.embed_batch(texts))
     
     def embed_query(self, text: str) -> List[float]:
-        """Embed a query."""
-        return self.llm.embed(text) 
\ No newline at end of file
+        """Embed a query, reusing the cached embedding for repeated queries."""
+        embedding = self._get_cached_query(text)
+        if embedding is None:
+            embedding = run_sync(self.llm.embed(text))
+            self._cache_query(text, embedding)
+        return embedding
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Asynchronously embed a list of documents in a single batch request."""
+        return await self.llm.embed_batch(texts)
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """Asynchronously embed a query, reusing cached and in-flight results."""
+        embedding = self._get_cached_query(text)
+        if embedding is not None:
+            return embedding
+        
+        pending = self._pending_queries.get(text)
+        if pending is None:
+            pending = asyncio.ensure_future(self.llm.embed(text))
+            self._pending_queries[text] = pending
+            try:
+                # Shield so cancelling this caller doesn't fail other waiters
+                embedding = await asyncio.shield(pending)
+            finally:
+                del self._pending_queries[text]
+            self._cache_query(text, embedding)
+            return embedding
+        return await asyncio.shield(pending) 
\ No newline at end of file
@@ -1,16 +1,74 @@
+import asyncio
 import os
-from typing import Dict, List, Any, Optional
-import openai
-from tiktoken import encoding_for_model
-from .base import BaseLLM, LLMConfig, LLMResponse
+from functools import lru_cache
+from itertools import chain
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Any, Optional, Tuple
+from .base import BaseLLM, LLMConfig, LLMResponse, get_loop_local
+
+if TYPE_CHECKING:
+    import openai
+
+# Shared clients so all instances reuse one connection pool per event loop;
+# pooled connections belong to the loop that opened them
+_CLIENTS: Dict[asyncio.AbstractEventLoop, "openai.AsyncOpenAI"] = {}
+
+def _create_client() -> "openai.AsyncOpenAI":
+    """Create an OpenAI client with a connection pool sized for gathered calls."""
+    # Imported lazily to keep the SDK out of processes that never use it
+    import httpx
+    import openai
+    
+    return openai.AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        max_retries=2,
+        timeout=60.0,
+        # Size the pool so gathered requests don't queue on the default limit
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        )
+    )
+
+def _get_client() -> "openai.AsyncOpenAI":
+    """Get the running event loop's OpenAI client, creating it on first use."""
+    return get_loop_local(_CLIENTS, _create_client)
+
+@lru_cache(maxsize=32)
+def _get_encoding(model: str):
+    """Get the tiktoken encoding for a model, shared across instances."""
+    from tiktoken import encoding_for_model
+    return encoding_for_model(model)
+
+# Context window sizes in tokens, matched by longest model-name prefix
+_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4-32k": 32768,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+}
+_DEFAULT_CONTEXT_WINDOW = 8192
+
+@lru_cache(maxsize=32)
+def _get_context_window(model: str) -> int:
+    """Get the context window size for a model."""
+    for prefix in sorted(_CONTEXT_WINDOWS, key=len, reverse=True):
+        if model.startswith(prefix):
+            return _CONTEXT_WINDOWS[prefix]
+    return _DEFAULT_CONTEXT_WINDOW
 
 class OpenAILLM(BaseLLM):
     """OpenAI LLM implementation."""
     
     def __init__(self, config: LLMConfig):
         super().__init__(config)
-        self.client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.encoding = encoding_for_model(config.model)
+        self.encoding = _get_encoding(config.model)
+        self._context_cache_key: Optional[tuple] = None
+        self._context_cache = ""
+    
+    @property
+    def client(self) -> "openai.AsyncOpenAI":
+        """The shared OpenAI client for the running event loop."""
+        return _get_client()
     
     async def generate(
         self,
@@ -19,38 +77,79 @@ class OpenAILLM(BaseLLM):
         **kwargs
     ) -> LLMResponse:
         """Generate a response using OpenAI's API."""
-        messages = self._prepare_messages(prompt, context)
+        messages, prompt_tokens = self._prepare_messages_with_count(prompt, context)
         
-        response = await self.client.chat.completions.create(
-            model=self.config.model,
-            messages=messages,
-            temperature=self.config.temperature,
-            max_tokens=self.config.max_tokens,
-            top_p=self.config.top_p,
-            **kwargs
-        )
+        async with self._sem:
+            response = await self.client.chat.completions.create(
+                model=self.config.model,
+                messages=messages,
+                temperature=self.config.temperature,
+                max_tokens=self._max_tokens_budget(prompt_tokens),
+                top_p=self.config.top_p,
+                **kwargs
+            )
         
         return LLMResponse(
             text=response.choices[0].message.content,
             raw_response=response,
             metadata={
                 "finish_reason": response.choices[0].finish_reason,
-                "usage": response.usage._asdict()
+                # Kept as the SDK object; convert only when serializing
+                "usage": response.usage
             }
         )
     
+    async def generate_stream(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream a response from OpenAI's API as it is generated."""
+        messages, prompt_tokens = self._prepare_messages_with_count(prompt, context)
+        
+        async with self._sem:
+            response = await self.client.chat.completions.create(
+                model=self.config.model,
+                messages=messages,
+                temperature=self.config.temperature,
+                max_tokens=self._max_tokens_budget(prompt_tokens),
+                top_p=self.config.top_p,
+                stream=True,
+                **kwargs
+            )
+            async for chunk in response:
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content or ""
+    
     async def embed(self, text: str) -> List[float]:
         """Generate embeddings using OpenAI's API."""
-        response = await self.client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=text
-        )
+        async with self._sem:
+            response = await self.client.embeddings.create(
+                model="text-embedding-ada-002",
+                input=text
+            )
         return response.data[0].embedding
     
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for several texts in a single API request."""
+        if not texts:
+            return []
+        async with self._sem:
+            response = await self.client.embeddings.create(
+                model="text-embedding-ada-002",
+                input=texts
+            )
+        return [item.embedding for item in response.data]
+    
     def get_token_count(self, text: str) -> int:
         """Get the number of tokens in the given text."""
         return len(self.encoding.encode(text))
     
+    def get_token_counts_batch(self, texts: List[str]) -> List[int]:
+        """Get the number of tokens in each text with one batched encode."""
+        return [len(ids) for ids in self.encoding.encode_ordinary_batch(texts)]
+    
     def _prepare_messages(
         self,
         prompt: str,
@@ -69,20 +168,47 @@ class OpenAILLM(BaseLLM):
         
         return messages
     
+    def _prepare_messages_with_count(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Dict[str, str]], int]:
+        """Prepare messages and count their tokens in a single encoding pass."""
+        messages = self._prepare_messages(prompt, context)
+        # Encoded one by one: the batch encoder starts a thread pool per call,
+        # which costs more than it saves for one or two messages
+        count = sum(len(self.encoding.encode_ordinary(m["content"])) for m in messages)
+        # Chat formatting adds a few tokens per message plus the reply primer
+        return messages, count + 4 * len(messages) + 3
+    
+    def _max_tokens_budget(self, prompt_tokens: int) -> int:
+        """Cap the completion length so prompt plus reply fit the context window."""
+        remaining = _get_context_window(self.config.model) - prompt_tokens
+        return max(1, min(self.config.max_tokens, remaining))
+    
     def _format_context(self, context: Dict[str, Any]) -> str:
         """Format context into a system message."""
-        context_parts = []
+        personality = context.get("personality", {})
+        memory_contents = tuple(m["content"] for m in context.get("memories", []))
         
-        if "personality" in context:
-            traits = context["personality"]
-            context_parts.append("Personality traits:")
-            for trait, value in traits.items():
-                context_parts.append(f"- {trait}: {value:.2f}")
+        # Successive calls in a chain usually share the same context, so
+        # reuse the last system message when nothing has changed
+        cache_key = (
+            "personality" in context,
+            tuple(personality.items()),
+            "memories" in context,
+            memory_contents
+        )
+        if cache_key == self._context_cache_key:
+            return self._context_cache
         
-        if "memories" in context:
-            memories = context["memories"]
-            context_parts.append("\nRelevant memories:")
-            for memory in memories:
-                context_parts.append(f"- {memory['content']}")
+        system_message = "\n".join(chain(
+            ["Personality traits:"] if "personality" in context else [],
+            (f"- {trait}: {value:.2f}" for trait, value in personality.items()),
+            ["\nRelevant memories:"] if "memories" in context else [],
+            (f"- {content}" for content in memory_contents)
+        ))
         
-        return "\n".join(context_parts) 
\ No newline at end of file
+        self._context_cache_key = cache_key
+        self._context_cache = system_message
+        return system_message 
\ No newline at end of file
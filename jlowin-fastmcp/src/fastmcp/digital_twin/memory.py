@@ -1,22 +1,271 @@
-from typing import Dict, List, Optional, Any
+import asyncio
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+from contextlib import contextmanager
 from pydantic import BaseModel, Field
 from datetime import datetime
 import json
-from sqlalchemy import create_engine, Column, Integer, String, JSON, DateTime
+from sqlalchemy import (
+    create_engine, event, insert, select, text, update,
+    Column, Integer, String, JSON, DateTime, Index, LargeBinary
+)
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
 import numpy as np
+from itertools import islice
 from pathlib import Path
 import logging
 from .llm.base import BaseLLM
 
+try:
+    import faiss
+except ImportError:  # pragma: no cover - optional dependency
+    faiss = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    from numba import njit, prange
+except ImportError:  # pragma: no cover - optional dependency
+    njit = None
+
+try:
+    import re2
+except ImportError:  # pragma: no cover - optional dependency
+    re2 = None
+
 Base = declarative_base()
 
 logger = logging.getLogger(__name__)
 
+# Row growth step for the in-memory embedding matrix
+_EMBEDDING_CHUNK = 256
+
+# Rows dequantized at a time when scoring the int8 embedding matrix
+_SCORE_TILE = 4096
+
+# Append-only memory store: one JSON object per line, plus the matching
+# float32 embedding rows back to back
+_MEMORY_LOG = "memories.jsonl"
+_EMBEDDING_LOG = "embeddings.f32"
+# Width of the float32 rows in the embedding log, as decimal text
+_EMBEDDING_DIM = "embeddings.dim"
+
+# Units accepted in MemorySystem time periods such as "12h" or "2w"
+_PERIOD_UNITS = {
+    "h": np.timedelta64(1, "h"),
+    "d": np.timedelta64(1, "D"),
+    "w": np.timedelta64(7, "D"),
+    "m": np.timedelta64(30, "D"),
+}
+
+def _epoch_ns(timestamp: Any) -> int:
+    """Convert an ISO timestamp to epoch nanoseconds, or 0 if missing or invalid."""
+    try:
+        value = np.datetime64(timestamp, "ns")
+    except (TypeError, ValueError):
+        return 0
+    return 0 if np.isnat(value) else int(value.astype(np.int64))
+
+def _json_dumps(data: Any, indent: bool = False) -> bytes:
+    """Serialize data to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    return json.dumps(data, indent=2 if indent else None).encode("utf-8")
+
+def _json_loads(data: bytes) -> Any:
+    """Deserialize JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _read_json(path: Path) -> Any:
+    """Read a JSON file."""
+    with open(path, "rb") as f:
+        return _json_loads(f.read())
+
+def _read_jsonl(path: Path) -> Tuple[List[Any], bool]:
+    """Read a JSON-lines file up to its first unreadable line.
+    
+    Returns:
+        The records read, and whether the file was cut short by a torn line
+    """
+    records = []
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                records.append(_json_loads(line))
+            except ValueError:
+                return records, True
+    return records, False
+
+def _write_json(path: Path, data: Any) -> None:
+    """Write data to a file as indented JSON."""
+    with open(path, "wb") as f:
+        f.write(_json_dumps(data, indent=True))
+
+# SQLite full-text index over memory content, kept in sync by triggers
+_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts "
+    "USING fts5(content, content='memories', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS memories_fts_ai AFTER INSERT ON memories BEGIN "
+    "INSERT INTO memories_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS memories_fts_ad AFTER DELETE ON memories BEGIN "
+    "INSERT INTO memories_fts(memories_fts, rowid, content) "
+    "VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS memories_fts_au "
+    "AFTER UPDATE OF content ON memories BEGIN "
+    "INSERT INTO memories_fts(memories_fts, rowid, content) "
+    "VALUES ('delete', old.id, old.content); "
+    "INSERT INTO memories_fts(rowid, content) VALUES (new.id, new.content); END",
+)
+
+_FTS_SEARCH = text(
+    "SELECT memories.* FROM memories "
+    "JOIN memories_fts ON memories_fts.rowid = memories.id "
+    "WHERE memories_fts MATCH :query "
+    "ORDER BY bm25(memories_fts), memories.importance DESC "
+    "LIMIT :limit"
+)
+
+def _set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    """Use write-ahead logging with relaxed syncing on new SQLite connections."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+# Memories queued before MemoryManager embeds them in one encoder call
+_EMBED_BATCH = 32
+# Rows fetched per round trip when streaming query results
+_YIELD_PER = 64
+
+# BM25 parameters and the cosine share of hybrid search scores
+_BM25_K1 = 1.5
+_BM25_B = 0.75
+_COSINE_WEIGHT = 0.6
+
+# RE2 matches in linear time without backtracking; its \w is ASCII-only, so
+# letter and number classes stand in for the stdlib's Unicode \w
+if re2 is not None:
+    _TOKEN_RE = re2.compile(r"[\pL\pN_]+")
+else:
+    _TOKEN_RE = re.compile(r"\w+")
+
+def _tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens for BM25."""
+    return _TOKEN_RE.findall(text.lower())
+
+if njit is not None:
+    @njit(fastmath=True, cache=True)
+    def _bm25_accumulate(
+        rows: np.ndarray, tfs: np.ndarray, idfs: np.ndarray,
+        doc_len: np.ndarray, avgdl: float, scores: np.ndarray
+    ) -> None:
+        """Add each posting's BM25 term score to `scores`, in place."""
+        # Serial: postings of different terms can hit the same row
+        for j in range(rows.shape[0]):
+            row = rows[j]
+            tf = tfs[j]
+            norm = _BM25_K1 * (1.0 - _BM25_B + _BM25_B * doc_len[row] / avgdl)
+            scores[row] += idfs[j] * tf * (_BM25_K1 + 1.0) / (tf + norm)
+else:
+    def _bm25_accumulate(
+        rows: np.ndarray, tfs: np.ndarray, idfs: np.ndarray,
+        doc_len: np.ndarray, avgdl: float, scores: np.ndarray
+    ) -> None:
+        """Add each posting's BM25 term score to `scores`, in place."""
+        norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * doc_len[rows] / avgdl)
+        np.add.at(scores, rows, idfs * tfs * (_BM25_K1 + 1) / (tfs + norm))
+
+class _PostingList:
+    """One term's BM25 postings as row and term-frequency arrays.
+    
+    The arrays grow by doubling; the first `n` entries are in use.
+    """
+    
+    __slots__ = ("rows", "tfs", "n")
+    
+    def __init__(self):
+        self.rows = np.empty(4, dtype=np.int64)
+        self.tfs = np.empty(4, dtype=np.float32)
+        self.n = 0
+    
+    def append(self, rows: List[int], tfs: List[int]) -> None:
+        """Add postings for the given rows."""
+        needed = self.n + len(rows)
+        if needed > len(self.rows):
+            capacity = 2 * needed
+            self.rows = np.resize(self.rows[:self.n], capacity)
+            self.tfs = np.resize(self.tfs[:self.n], capacity)
+        self.rows[self.n:needed] = rows
+        self.tfs[self.n:needed] = tfs
+        self.n = needed
+
+def _pack_embedding(embedding: Optional[List[float]]) -> Optional[bytes]:
+    """Pack an embedding as float32 bytes for the `Memory.embedding` column."""
+    if embedding is None:
+        return None
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+def _unpack_embedding(data: Optional[bytes]) -> Optional[np.ndarray]:
+    """Read a packed `Memory.embedding` value as a zero-copy float32 array."""
+    if data is None:
+        return None
+    return np.frombuffer(data, dtype=np.float32)
+
+def _normalize(embedding: List[float]) -> np.ndarray:
+    """Convert an embedding to a unit-length float32 vector."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) + 1e-12)
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _normalize_rows(rows: np.ndarray) -> np.ndarray:
+        """Scale each row of a float32 matrix to unit length, in place."""
+        for i in prange(rows.shape[0]):
+            total = 0.0
+            for j in range(rows.shape[1]):
+                total += rows[i, j] * rows[i, j]
+            scale = 1.0 / (np.sqrt(total) + 1e-12)
+            for j in range(rows.shape[1]):
+                rows[i, j] *= scale
+        return rows
+else:
+    def _normalize_rows(rows: np.ndarray) -> np.ndarray:
+        """Scale each row of a float32 matrix to unit length, in place."""
+        rows /= np.linalg.norm(rows, axis=1, keepdims=True) + 1e-12
+        return rows
+
+def _quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantize (N, dim) float32 rows to int8 with a per-row scale.
+    
+    Returns:
+        The int8 rows and the float32 scales that map them back
+    """
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
 class Memory(Base):
     """SQLAlchemy model for storing memories."""
     __tablename__ = "memories"
+    __table_args__ = (
+        Index("ix_memories_timestamp", "timestamp"),
+        Index("ix_memories_importance", "importance"),
+    )
     
     id = Column(Integer, primary_key=True)
     timestamp = Column(DateTime, default=datetime.now)
@@ -24,83 +273,453 @@ class Memory(Base):
     context = Column(JSON)
     importance = Column(Integer, default=0)  # 0-100 scale
     category = Column(String)
-    embedding = Column(JSON)  # Store vector embeddings for similarity search
+    embedding = Column(LargeBinary)  # Packed float32 vector for similarity search
 
 class MemoryManager:
     """Manages the digital twin's memory system."""
-    def __init__(self, db_url: str = "sqlite:///digital_twin.db"):
+    def __init__(
+        self, db_url: str = "sqlite:///digital_twin.db", embedder: Optional[Any] = None
+    ):
+        """Set up the database, and the vector index when an embedder is given.
+        
+        `embedder` is a sentence-transformers style model: anything with an
+        `encode(texts, normalize_embeddings=True)` method.
+        """
         self.engine = create_engine(db_url)
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine, "connect", _set_sqlite_pragmas)
         Base.metadata.create_all(self.engine)
-        self.Session = sessionmaker(bind=self.engine)
+        # create_all skips the indexes of a table that already exists, so
+        # databases made before they were added get them here
+        for index in Memory.__table__.indexes:
+            index.create(self.engine, checkfirst=True)
+        # One session per thread, reused across calls
+        self.Session = scoped_session(sessionmaker(bind=self.engine))
+        self._fts = self._create_fts_index()
+        
+        # Unit-norm embedding rows quantized to int8, grown by doubling, with
+        # the scale, memory id and token count of each row alongside. The
+        # first `_n` rows are in use.
+        self.embedder = embedder
+        self._emb: Optional[np.ndarray] = None
+        self._scales = np.empty(0, dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._doc_len = np.empty(0, dtype=np.int64)
+        self._n = 0
+        # BM25 inverted index over the same rows: term -> its postings
+        self._postings: Dict[str, _PostingList] = {}
+        self._total_len = 0
+        # (memory id, content) of rows saved but not embedded yet
+        self._pending: List[Tuple[int, str]] = []
+        # Guards the in-memory index, which tool calls reach from worker
+        # threads; flushes of the pending queue also run one at a time
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        # Bumped on every write, so callers can tell whether stored memories
+        # changed since they last read them
+        self._generation = 0
+        # Width of the embedder's vectors; stored rows of another width are
+        # re-embedded on load
+        self._dim: Optional[int] = None
+        if embedder is not None:
+            self._dim = self._embedding_dim()
+            # Compile the BM25 kernel now rather than on the first search
+            _bm25_accumulate(
+                np.zeros(1, dtype=np.int64), np.ones(1, dtype=np.float32),
+                np.ones(1, dtype=np.float32), np.ones(1, dtype=np.int64),
+                1.0, np.zeros(1, dtype=np.float32)
+            )
+            self._load_index()
     
-    def add_memory(self, content: str, context: Dict[str, Any], 
-                  importance: int = 50, category: str = "general") -> None:
-        """Add a new memory to the system."""
+    @property
+    def generation(self) -> int:
+        """Number of writes made through this manager."""
+        return self._generation
+    
+    def _bump_generation(self) -> None:
+        """Record that stored memories changed."""
+        with self._lock:
+            self._generation += 1
+    
+    @contextmanager
+    def _session(self) -> Iterator[Session]:
+        """Yield the thread's session, rolling back on error."""
         session = self.Session()
         try:
-            memory = Memory(
-                content=content,
-                context=context,
-                importance=importance,
-                category=category
+            yield session
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            # Releases the connection and identity map; the session is reused
+            session.close()
+    
+    def _create_fts_index(self) -> bool:
+        """Create the FTS5 content index on SQLite, backfilling existing rows.
+        
+        Returns whether full-text search is available.
+        """
+        if self.engine.dialect.name != "sqlite":
+            return False
+        try:
+            with self.engine.begin() as conn:
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'memories_fts'"
+                )).first()
+                for statement in _FTS_DDL:
+                    conn.execute(text(statement))
+                if not exists:
+                    conn.execute(text(
+                        "INSERT INTO memories_fts(memories_fts) VALUES ('rebuild')"
+                    ))
+            return True
+        except OperationalError as e:
+            logger.error(f"Full-text search unavailable, using substring search: {e}")
+            return False
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as unit-norm float32 rows."""
+        return np.asarray(
+            self.embedder.encode(
+                texts,
+                batch_size=_EMBED_BATCH,
+                normalize_embeddings=True,
+                convert_to_numpy=True
+            ),
+            dtype=np.float32
+        ).reshape(len(texts), -1)
+    
+    def _embedding_dim(self) -> int:
+        """Get the width of the embedder's vectors."""
+        get_dim = getattr(self.embedder, "get_sentence_embedding_dimension", None)
+        dim = get_dim() if get_dim is not None else None
+        return dim or self._encode([""]).shape[1]
+    
+    def _check_embedding(self, embedding: List[float]) -> None:
+        """Reject an embedding whose width does not match the embedder's."""
+        if self._dim is not None and len(embedding) != self._dim:
+            raise ValueError(
+                f"Embedding has {len(embedding)} dimensions, expected {self._dim}"
             )
+    
+    def _load_index(self) -> None:
+        """Fill the search index from the database.
+        
+        Rows without an embedding, or with one from a model of another
+        width, are embedded now and saved.
+        """
+        row_bytes = self._dim * np.dtype(np.float32).itemsize
+        with self._session() as session:
+            rows = session.execute(
+                select(Memory.id, Memory.content, Memory.embedding).order_by(Memory.id)
+            ).all()
+            missing = [
+                i for i, row in enumerate(rows)
+                if row.embedding is None or len(row.embedding) != row_bytes
+            ]
+            vectors = {}
+            if missing:
+                encoded = self._encode([rows[i].content or "" for i in missing])
+                vectors = dict(zip(missing, encoded))
+                session.execute(update(Memory), [
+                    {"id": rows[i].id, "embedding": vector.tobytes()}
+                    for i, vector in vectors.items()
+                ])
+                session.commit()
+        if rows:
+            self._index_memories(
+                [row.id for row in rows],
+                [row.content or "" for row in rows],
+                _normalize_rows(np.stack([
+                    vectors[i] if i in vectors else _unpack_embedding(row.embedding)
+                    for i, row in enumerate(rows)
+                ]))
+            )
+    
+    def _flush_pending(self) -> None:
+        """Embed the queued memories in one batch, save and index them.
+        
+        The model and database run outside the index lock, so searches and
+        stores proceed meanwhile. Memories leave the queue only once they are
+        indexed, so a failed flush is retried by the next one.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending[:]
+            if not pending:
+                return
+            ids = [memory_id for memory_id, _ in pending]
+            contents = [content for _, content in pending]
+            vectors = self._encode(contents)
+            with self._session() as session:
+                session.execute(update(Memory), [
+                    {"id": memory_id, "embedding": vector.tobytes()}
+                    for memory_id, vector in zip(ids, vectors)
+                ])
+                session.commit()
+            with self._lock:
+                # Only flushes remove entries, and they run one at a time, so
+                # anything queued meanwhile is after these
+                del self._pending[:len(pending)]
+                self._index_memories(ids, contents, vectors)
+    
+    def _index_memories(
+        self, ids: List[int], contents: List[str], vectors: np.ndarray
+    ) -> None:
+        """Append search rows for the given memories.
+        
+        Adds each unit-norm embedding to the int8 vector matrix and each
+        content's term counts to the BM25 postings.
+        """
+        with self._lock:
+            needed = self._n + len(ids)
+            if self._emb is None or needed > len(self._emb):
+                capacity = max(_EMBEDDING_CHUNK, 2 * needed)
+                emb = np.empty((capacity, vectors.shape[1]), dtype=np.int8)
+                scales = np.empty(capacity, dtype=np.float32)
+                memory_ids = np.empty(capacity, dtype=np.int64)
+                doc_len = np.empty(capacity, dtype=np.int64)
+                if self._emb is not None:
+                    emb[:self._n] = self._emb[:self._n]
+                    scales[:self._n] = self._scales[:self._n]
+                    memory_ids[:self._n] = self._ids[:self._n]
+                    doc_len[:self._n] = self._doc_len[:self._n]
+                self._emb = emb
+                self._scales = scales
+                self._ids = memory_ids
+                self._doc_len = doc_len
+            self._emb[self._n:needed], self._scales[self._n:needed] = _quantize(vectors)
+            self._ids[self._n:needed] = ids
+            
+            # Collect the batch's postings per term, then append each term's
+            # at once
+            batch: Dict[str, Tuple[List[int], List[int]]] = {}
+            for row, content in enumerate(contents, start=self._n):
+                terms = _tokenize(content)
+                for term, tf in Counter(terms).items():
+                    rows, tfs = batch.setdefault(term, ([], []))
+                    rows.append(row)
+                    tfs.append(tf)
+                self._doc_len[row] = len(terms)
+                self._total_len += len(terms)
+            for term, (rows, tfs) in batch.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = _PostingList()
+                postings.append(rows, tfs)
+            self._n = needed
+    
+    def _bm25_scores(self, query: str) -> np.ndarray:
+        """Score every indexed row against the query with Okapi BM25."""
+        scores = np.zeros(self._n, dtype=np.float32)
+        # Only the query terms' postings are visited, concatenated into one
+        # pass with each posting's term idf alongside
+        postings = [p for p in map(self._postings.get, set(_tokenize(query))) if p]
+        if not postings:
+            return scores
+        rows = np.concatenate([p.rows[:p.n] for p in postings])
+        tfs = np.concatenate([p.tfs[:p.n] for p in postings])
+        counts = np.array([p.n for p in postings], dtype=np.int64)
+        df = counts.astype(np.float32)
+        idf = np.log(1.0 + (self._n - df + 0.5) / (df + 0.5))
+        _bm25_accumulate(
+            rows, tfs, np.repeat(idf, counts),
+            self._doc_len, max(self._total_len / self._n, 1e-12), scores
+        )
+        return scores
+    
+    @staticmethod
+    def _to_dict(m: Memory) -> Dict[str, Any]:
+        """Convert a memory row to the dict returned by the public methods."""
+        return {
+            "id": m.id,
+            "timestamp": m.timestamp,
+            "content": m.content,
+            "context": m.context,
+            "importance": m.importance,
+            "category": m.category
+        }
+    
+    def add_memory(self, content: str, context: Dict[str, Any], 
+                  importance: int = 50, category: str = "general",
+                  embedding: Optional[List[float]] = None) -> None:
+        """Add a new memory to the system.
+        
+        With an embedder and no explicit embedding, the memory is saved now
+        but embedded later, together with other queued memories.
+        """
+        self.store_record({
+            "content": content,
+            "context": context,
+            "importance": importance,
+            "category": category,
+            "embedding": embedding
+        })
+    
+    def store_record(self, record: Dict[str, Any]) -> int:
+        """Save one prepared memory record and return its id.
+        
+        `record` holds `Memory` column values, as for `add_memories`; its
+        context is stored as given, without copying. With an embedder and no
+        "embedding", the memory is embedded later with other queued memories.
+        """
+        embedding = record.get("embedding")
+        vector = None
+        if self.embedder is not None and embedding is not None:
+            self._check_embedding(embedding)
+            vector = _normalize(embedding)
+        with self._session() as session:
+            memory = Memory(**{**record, "embedding": _pack_embedding(embedding)})
             session.add(memory)
+            session.flush()
+            memory_id = memory.id
             session.commit()
-        finally:
-            session.close()
+        self._bump_generation()
+        if vector is not None:
+            self._index_memories([memory_id], [record["content"]], vector[None, :])
+        elif self.embedder is not None:
+            with self._lock:
+                self._pending.append((memory_id, record["content"]))
+                full = len(self._pending) >= _EMBED_BATCH
+            if full:
+                self._flush_pending()
+        return memory_id
+    
+    def add_memories(self, records: List[Dict[str, Any]]) -> None:
+        """Add several memories in a single batched INSERT.
+        
+        Each record holds `Memory` column values, e.g. content, context,
+        importance and category. An "embedding" may be given as a list of
+        floats and is packed for storage; with an embedder, records without
+        one are embedded in a single batch.
+        """
+        if not records:
+            return
+        encoded = {}
+        if self.embedder is not None:
+            for record in records:
+                if record.get("embedding") is not None:
+                    self._check_embedding(record["embedding"])
+            missing = [
+                i for i, record in enumerate(records) if record.get("embedding") is None
+            ]
+            if missing:
+                encoded = dict(zip(
+                    missing, self._encode([records[i]["content"] for i in missing])
+                ))
+            records = [
+                {**record, "embedding": encoded[i]} if i in encoded else record
+                for i, record in enumerate(records)
+            ]
+        records = [
+            {**record, "embedding": _pack_embedding(record["embedding"])}
+            if "embedding" in record else record
+            for record in records
+        ]
+        with self._session() as session:
+            ids = session.scalars(
+                insert(Memory).returning(Memory.id, sort_by_parameter_order=True),
+                records
+            ).all()
+            session.commit()
+        self._bump_generation()
+        if self.embedder is not None:
+            vectors = np.stack([
+                _unpack_embedding(record["embedding"]) for record in records
+            ])
+            self._index_memories(
+                ids, [record["content"] for record in records], _normalize_rows(vectors)
+            )
     
     def get_recent_memories(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Retrieve the most recent memories."""
-        session = self.Session()
-        try:
-            memories = session.query(Memory)\
-                .order_by(Memory.timestamp.desc())\
-                .limit(limit)\
-                .all()
-            return [{
-                "id": m.id,
-                "timestamp": m.timestamp,
-                "content": m.content,
-                "context": m.context,
-                "importance": m.importance,
-                "category": m.category
-            } for m in memories]
-        finally:
-            session.close()
+        return list(self.iter_recent(limit))
+    
+    def iter_recent(self, limit: int = 10) -> Iterator[Dict[str, Any]]:
+        """Yield the most recent memories, newest first.
+        
+        Rows are fetched from the cursor in small batches, so a large `limit`
+        does not load every row before the first one is yielded.
+        """
+        with self._session() as session:
+            memories = session.scalars(
+                select(Memory)
+                .order_by(Memory.timestamp.desc())
+                .limit(limit)
+                .execution_options(yield_per=_YIELD_PER)
+            )
+            for m in memories:
+                yield self._to_dict(m)
     
     def search_memories(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
         Search memories based on content similarity.
-        This is a simple implementation that can be enhanced with vector similarity search.
+        With an embedder this ranks every memory by a blend of cosine
+        similarity and BM25. Otherwise, on SQLite it is an FTS5 phrase match
+        ranked by BM25, and other databases fall back to a substring match
+        ranked by importance.
         """
-        session = self.Session()
-        try:
-            memories = session.query(Memory)\
-                .filter(Memory.content.ilike(f"%{query}%"))\
-                .order_by(Memory.importance.desc())\
-                .limit(limit)\
-                .all()
-            return [{
-                "id": m.id,
-                "timestamp": m.timestamp,
-                "content": m.content,
-                "context": m.context,
-                "importance": m.importance,
-                "category": m.category
-            } for m in memories]
-        finally:
-            session.close()
+        if self.embedder is not None and query.strip():
+            self._flush_pending()
+            return self._hybrid_search(query, limit)
+        with self._session() as session:
+            if self._fts and query.strip():
+                # Quote the query as a single phrase so FTS syntax is not parsed
+                phrase = '"' + query.replace('"', '""') + '"'
+                memories = session.scalars(
+                    select(Memory).from_statement(_FTS_SEARCH),
+                    {"query": phrase, "limit": limit}
+                )
+            else:
+                memories = session.scalars(
+                    select(Memory)
+                    .filter(Memory.content.ilike(f"%{query}%"))
+                    .order_by(Memory.importance.desc())
+                    .limit(limit)
+                )
+            return [self._to_dict(m) for m in memories]
+    
+    def _hybrid_search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Return the `limit` memories that best match the query, best first."""
+        if limit <= 0 or self._n == 0:
+            return []
+        query_vector = self._encode([query])[0]
+        with self._lock:
+            n = self._n
+            # Rows and query are unit-norm, so the product is cosine
+            # similarity; the int8 rows are widened a tile at a time
+            scores = np.empty(n, dtype=np.float32)
+            for start in range(0, n, _SCORE_TILE):
+                stop = min(start + _SCORE_TILE, n)
+                tile = self._emb[start:stop].astype(np.float32)
+                scores[start:stop] = tile @ query_vector
+            scores *= self._scales[:n]
+            # Blend in BM25, scaled to [0, 1], so exact terms like names still rank
+            bm25 = self._bm25_scores(query)
+            ids = self._ids[:n].copy()
+        top_bm25 = bm25.max()
+        scores *= _COSINE_WEIGHT
+        if top_bm25 > 0:
+            scores += (1 - _COSINE_WEIGHT) * (bm25 / top_bm25)
+        if limit < n:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(n)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        ranked = ids[top].tolist()
+        with self._session() as session:
+            found = session.scalars(select(Memory).where(Memory.id.in_(ranked)))
+            memories = {m.id: m for m in found}
+            return [self._to_dict(memories[i]) for i in ranked if i in memories]
     
     def update_memory_importance(self, memory_id: int, new_importance: int) -> None:
         """Update the importance of a specific memory."""
-        session = self.Session()
-        try:
-            memory = session.query(Memory).get(memory_id)
+        with self._session() as session:
+            memory = session.get(Memory, memory_id)
             if memory:
                 memory.importance = new_importance
                 session.commit()
-        finally:
-            session.close()
+                self._bump_generation()
 
 class MemorySystem:
     """Vectorized memory system for the digital twin."""
@@ -123,30 +742,296 @@ class MemorySystem:
         self.memory_dir.mkdir(parents=True, exist_ok=True)
         self.max_memories = max_memories
         self.memories: List[Dict[str, Any]] = []
+        # Contiguous (capacity, dim) int8 copy of the embeddings, with the
+        # per-row scales, memory types and epoch-ns timestamps alongside, for
+        # batched scoring and filtering. The first `_emb_count` rows line up
+        # with `self.memories`.
+        self._emb_matrix: Optional[np.ndarray] = None
+        self._scales: np.ndarray = np.empty(0, dtype=np.float32)
+        self._types: np.ndarray = np.empty(0, dtype=object)
+        self._times: np.ndarray = np.empty(0, dtype=np.int64)
+        self._emb_count = 0
+        # Optional 8-bit FAISS inner-product index over the same rows, built
+        # lazily
+        self._index = None
+        # Records in the on-disk log, including ones already trimmed in memory
+        self._log_count = 0
+        # Whether the embedding log's row width is recorded on disk
+        self._dim_recorded = False
         self._load_memories()
     
     def _load_memories(self) -> None:
-        """Load memories from disk."""
+        """Load memories from disk.
+        
+        Memories are read from the append-only memories.jsonl and
+        embeddings.f32 logs, whose row width is kept in embeddings.dim.
+        Stores in the older memories.json format (with embeddings in
+        embeddings.npy or inline) are still read and are rewritten as logs.
+        
+        If the logs disagree, e.g. after a torn append, the longest prefix
+        of memories that have embeddings is kept and the logs are rewritten.
+        """
+        embeddings: Any = []
+        migrate = False
         try:
+            log_file = self.memory_dir / _MEMORY_LOG
+            embedding_log = self.memory_dir / _EMBEDDING_LOG
+            dim_file = self.memory_dir / _EMBEDDING_DIM
             memory_file = self.memory_dir / "memories.json"
-            if memory_file.exists():
-                with open(memory_file, "r") as f:
-                    self.memories = json.load(f)
-                logger.info(f"Loaded {len(self.memories)} memories")
+            embedding_file = self.memory_dir / "embeddings.npy"
+            if log_file.exists():
+                self.memories, migrate = _read_jsonl(log_file)
+                self._log_count = len(self.memories)
+                values = (
+                    np.fromfile(embedding_log, dtype=np.float32)
+                    if embedding_log.exists() else np.empty(0, dtype=np.float32)
+                )
+                if dim_file.exists():
+                    dim = int(dim_file.read_text())
+                    # An empty store may next be filled by another model
+                    self._dim_recorded = bool(self.memories)
+                elif self.memories and values.size % len(self.memories) == 0:
+                    # Logs written before the width was recorded
+                    dim = values.size // len(self.memories)
+                elif self.memories:
+                    raise ValueError(
+                        f"{values.size} embedding values for "
+                        f"{len(self.memories)} memories and no recorded dimension"
+                    )
+                else:
+                    dim = 0
+                if dim:
+                    # A trailing partial row is ignored
+                    rows = values.size // dim
+                    embeddings = values[:rows * dim].reshape(rows, dim)
+            elif memory_file.exists():
+                self.memories = _read_json(memory_file)
+                if embedding_file.exists():
+                    embeddings = np.load(embedding_file, mmap_mode="r")
+                else:
+                    embeddings = [memory.pop("embedding") for memory in self.memories]
+                migrate = True
+            
+            count = min(len(embeddings), len(self.memories))
+            if count != len(embeddings) or count != len(self.memories):
+                logger.warning(
+                    f"{len(embeddings)} embeddings for {len(self.memories)} "
+                    f"memories; keeping the first {count}"
+                )
+                self.memories = self.memories[:count]
+                embeddings = embeddings[:count]
+                migrate = True
+            
+            # The log may hold more records than the limit until it is rotated
+            if len(self.memories) > self.max_memories:
+                self.memories = self.memories[-self.max_memories:]
+                embeddings = embeddings[-self.max_memories:]
+            logger.info(f"Loaded {len(self.memories)} memories")
         except Exception as e:
             logger.error(f"Error loading memories: {e}")
             self.memories = []
+            embeddings = []
+            migrate = False
+        self._rebuild_embedding_matrix(embeddings)
+        if migrate:
+            self._save_memories()
+        else:
+            self._load_index()
+    
+    def _load_index(self) -> None:
+        """Load the persisted FAISS index if it matches the loaded memories."""
+        index_file = self.memory_dir / "memories.faiss"
+        if faiss is None or not index_file.exists():
+            return
+        try:
+            index = faiss.read_index(str(index_file))
+            # The index is only written on log rotation, so it is stale once
+            # anything has been appended since
+            if index.ntotal == self._emb_count == self._log_count:
+                self._index = index
+        except Exception as e:
+            logger.error(f"Error loading memory index: {e}")
+    
+    def _get_index(self):
+        """Get the FAISS index, building it from the embedding matrix if needed.
+        
+        Returns:
+            The index, or None if FAISS is not installed
+        """
+        if faiss is None or self._emb_count == 0:
+            return None
+        if self._index is None:
+            dim = self._emb_matrix.shape[1]
+            index = faiss.IndexScalarQuantizer(
+                dim, faiss.ScalarQuantizer.QT_8bit_uniform, faiss.METRIC_INNER_PRODUCT
+            )
+            # Rows are unit-norm, so every component lies in [-1, 1]
+            index.train(np.stack([-np.ones(dim), np.ones(dim)]).astype(np.float32))
+            index.add(self._dequantize(0, self._emb_count))
+            self._index = index
+        return self._index
+    
+    def _dequantize(self, start: int, stop: int) -> np.ndarray:
+        """Get rows `start:stop` of the embedding matrix as float32."""
+        rows = self._emb_matrix[start:stop].astype(np.float32)
+        rows *= self._scales[start:stop, None]
+        return rows
+    
+    def _rebuild_embedding_matrix(self, embeddings: Any) -> None:
+        """Rebuild the embedding matrix from an (N, dim) array of embeddings.
+        
+        Args:
+            embeddings: One embedding per entry in `self.memories`
+        """
+        self._index = None
+        self._emb_matrix = None
+        self._scales = np.empty(0, dtype=np.float32)
+        self._types = np.empty(0, dtype=object)
+        self._times = np.empty(0, dtype=np.int64)
+        self._emb_count = len(self.memories)
+        if self._emb_count == 0:
+            return
+        
+        rows = _normalize_rows(np.array(embeddings, dtype=np.float32))
+        capacity = max(_EMBEDDING_CHUNK, self._emb_count)
+        self._emb_matrix = np.empty((capacity, rows.shape[1]), dtype=np.int8)
+        self._scales = np.empty(capacity, dtype=np.float32)
+        quantized, scales = _quantize(rows)
+        self._emb_matrix[:self._emb_count] = quantized
+        self._scales[:self._emb_count] = scales
+        self._types = np.empty(capacity, dtype=object)
+        self._types[:self._emb_count] = [memory["type"] for memory in self.memories]
+        self._times = np.empty(capacity, dtype=np.int64)
+        # Missing or invalid timestamps count as the previous memory's, so
+        # the times stay sorted for searchsorted
+        times = self._times[:self._emb_count]
+        times[:] = [_epoch_ns(memory.get("timestamp")) for memory in self.memories]
+        np.maximum.accumulate(times, out=times)
+    
+    def _append_embedding(
+        self,
+        embedding: List[float],
+        memory_type: str,
+        timestamp: str
+    ) -> np.ndarray:
+        """Append one row to the embedding matrix, growing it in chunks.
+        
+        Rows are unit-normalized before quantization, so a dot product with
+        a normalized query (times the row scale) is the cosine similarity.
+        The embedding is checked before anything is written, so a rejected
+        one leaves the matrix unchanged.
+        
+        Returns:
+            The normalized float32 row that was appended
+        """
+        vector = _normalize(embedding)
+        if self._emb_matrix is not None and vector.shape != self._emb_matrix.shape[1:]:
+            raise ValueError(
+                f"Embedding has shape {vector.shape}, expected "
+                f"({self._emb_matrix.shape[1]},)"
+            )
+        timestamp_ns = _epoch_ns(timestamp)
+        if self._emb_count:
+            timestamp_ns = max(timestamp_ns, int(self._times[self._emb_count - 1]))
+        if self._emb_matrix is None or self._emb_count == len(self._emb_matrix):
+            capacity = max(_EMBEDDING_CHUNK, 2 * self._emb_count)
+            matrix = np.empty((capacity, vector.shape[0]), dtype=np.int8)
+            scales = np.empty(capacity, dtype=np.float32)
+            types = np.empty(capacity, dtype=object)
+            times = np.empty(capacity, dtype=np.int64)
+            if self._emb_matrix is not None:
+                matrix[:self._emb_count] = self._emb_matrix[:self._emb_count]
+                scales[:self._emb_count] = self._scales[:self._emb_count]
+                types[:self._emb_count] = self._types[:self._emb_count]
+                times[:self._emb_count] = self._times[:self._emb_count]
+            self._emb_matrix = matrix
+            self._scales = scales
+            self._types = types
+            self._times = times
+        quantized, scale = _quantize(vector[None, :])
+        self._emb_matrix[self._emb_count] = quantized[0]
+        self._scales[self._emb_count] = scale[0]
+        self._types[self._emb_count] = memory_type
+        self._times[self._emb_count] = timestamp_ns
+        self._emb_count += 1
+        if self._index is not None:
+            self._index.add(vector[None, :])
+        return vector
+    
+    def _drop_oldest_embeddings(self, count: int) -> None:
+        """Remove the first `count` rows, keeping the matrix aligned after trimming."""
+        remaining = self._emb_count - count
+        self._emb_matrix[:remaining] = self._emb_matrix[count:self._emb_count]
+        self._scales[:remaining] = self._scales[count:self._emb_count]
+        self._types[:remaining] = self._types[count:self._emb_count]
+        self._types[remaining:self._emb_count] = None
+        self._times[:remaining] = self._times[count:self._emb_count]
+        self._emb_count = remaining
+        if self._index is not None:
+            # Flat indexes compact on removal, so positions stay aligned
+            self._index.remove_ids(np.arange(count, dtype=np.int64))
     
     def _save_memories(self) -> None:
-        """Save memories to disk."""
+        """Rewrite the on-disk logs from the in-memory memories.
+        
+        This is the rotation step: it drops records that were trimmed since
+        the last rewrite. New memories are otherwise only appended.
+        """
         try:
-            memory_file = self.memory_dir / "memories.json"
-            with open(memory_file, "w") as f:
-                json.dump(self.memories, f, indent=2)
+            log_file = self.memory_dir / _MEMORY_LOG
+            embedding_log = self.memory_dir / _EMBEDDING_LOG
+            tmp_log = log_file.with_suffix(".tmp")
+            tmp_embeddings = embedding_log.with_suffix(".tmp")
+            with open(tmp_log, "wb") as f:
+                f.writelines(_json_dumps(memory) + b"\n" for memory in self.memories)
+            with open(tmp_embeddings, "wb") as f:
+                # The log stays float32 so the on-disk format is unchanged
+                for start in range(0, self._emb_count, _SCORE_TILE):
+                    stop = min(start + _SCORE_TILE, self._emb_count)
+                    f.write(self._dequantize(start, stop).tobytes())
+            if self._emb_count:
+                self._write_dim()
+            else:
+                self._dim_recorded = False
+            tmp_embeddings.replace(embedding_log)
+            tmp_log.replace(log_file)
+            self._log_count = len(self.memories)
+            if self._index is not None:
+                faiss.write_index(self._index, str(self.memory_dir / "memories.faiss"))
             logger.info(f"Saved {len(self.memories)} memories")
         except Exception as e:
             logger.error(f"Error saving memories: {e}")
     
+    def _write_dim(self) -> None:
+        """Record the embedding log's row width next to the logs."""
+        dim_file = self.memory_dir / _EMBEDDING_DIM
+        tmp_dim = dim_file.with_name(dim_file.name + ".tmp")
+        tmp_dim.write_text(str(self._emb_matrix.shape[1]))
+        tmp_dim.replace(dim_file)
+        self._dim_recorded = True
+    
+    def _append_to_log(
+        self, memories: List[Dict[str, Any]], vectors: np.ndarray
+    ) -> None:
+        """Append memories to the on-disk logs, rotating them when needed."""
+        try:
+            if not self._dim_recorded:
+                self._write_dim()
+            # Vectors go first, so a crash mid-append leaves a spare vector
+            # rather than a memory without one
+            with open(self.memory_dir / _EMBEDDING_LOG, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self.memory_dir / _MEMORY_LOG, "ab") as f:
+                f.writelines(_json_dumps(memory) + b"\n" for memory in memories)
+            self._log_count += len(memories)
+        except Exception as e:
+            logger.error(f"Error saving memory: {e}")
+            return
+        
+        # Rewrite once trimmed records make up half the log
+        if self._log_count > 2 * self.max_memories:
+            self._save_memories()
+    
     async def add_memory(
         self,
         content: str,
@@ -164,28 +1049,47 @@ class MemorySystem:
             # Generate embedding
             embedding = await self.llm.embed(content)
             
-            # Create memory entry
+            # Create memory entry; the embedding lives in the embedding matrix
             memory = {
                 "content": content,
                 "type": memory_type,
-                "embedding": embedding,
                 "timestamp": datetime.utcnow().isoformat(),
                 "metadata": metadata or {}
             }
+            self._store([memory], [embedding])
             
-            # Add to memory list
-            self.memories.append(memory)
-            
+        except Exception as e:
+            logger.error(f"Error adding memory: {e}")
+            raise
+    
+    def _store(
+        self, memories: List[Dict[str, Any]], embeddings: List[List[float]]
+    ) -> None:
+        """Add embedded memories, trim to the limit, and append them to disk.
+        
+        Each memory joins `self.memories` only once its embedding row is in
+        place. If one fails, the memories before it are still kept and saved.
+        """
+        # Add to memory list
+        stored = []
+        vectors = []
+        try:
+            for memory, embedding in zip(memories, embeddings):
+                vectors.append(self._append_embedding(
+                    embedding, memory["type"], memory["timestamp"]
+                ))
+                self.memories.append(memory)
+                stored.append(memory)
+        finally:
             # Trim if over limit
             if len(self.memories) > self.max_memories:
-                self.memories = self.memories[-self.max_memories:]
+                excess = len(self.memories) - self.max_memories
+                self.memories = self.memories[excess:]
+                self._drop_oldest_embeddings(excess)
             
             # Save to disk
-            self._save_memories()
-            
-        except Exception as e:
-            logger.error(f"Error adding memory: {e}")
-            raise
+            if stored:
+                self._append_to_log(stored, np.stack(vectors))
     
     async def get_relevant_memories(
         self,
@@ -207,22 +1111,44 @@ class MemorySystem:
             # Generate query embedding
             query_embedding = await self.llm.embed(query)
             
-            # Filter by type if specified
-            memories = self.memories
-            if memory_type:
-                memories = [m for m in memories if m["type"] == memory_type]
+            if self._emb_count == 0:
+                return []
+            
+            # Both the query and the stored rows are unit-norm, so inner
+            # product is cosine similarity
+            query_vector = _normalize(query_embedding)
+            
+            # Use the FAISS index when available; type-filtered queries fall
+            # back to the masked scan below
+            index = self._get_index() if not memory_type else None
+            if index is not None:
+                k = min(limit, self._emb_count)
+                _, ids = index.search(query_vector[None, :], k)
+                return [self.memories[i] for i in ids[0] if i >= 0]
             
-            # Calculate similarities
-            similarities = []
-            for memory in memories:
-                similarity = np.dot(query_embedding, memory["embedding"])
-                similarities.append((similarity, memory))
+            # Score every memory, dequantizing the int8 rows a tile at a time
+            similarities = np.empty(self._emb_count, dtype=np.float32)
+            for start in range(0, self._emb_count, _SCORE_TILE):
+                stop = min(start + _SCORE_TILE, self._emb_count)
+                tile = self._emb_matrix[start:stop].astype(np.float32)
+                similarities[start:stop] = tile @ query_vector
+            similarities *= self._scales[:self._emb_count]
             
-            # Sort by similarity
-            similarities.sort(reverse=True)
+            # Filter by type if specified
+            indices = np.arange(self._emb_count)
+            if memory_type:
+                indices = np.flatnonzero(self._types[:self._emb_count] == memory_type)
+                similarities = similarities[indices]
             
-            # Return top matches
-            return [m for _, m in similarities[:limit]]
+            # Select the top matches in linear time, then order just those
+            if limit <= 0 or len(similarities) == 0:
+                return []
+            if limit < len(similarities):
+                top = np.argpartition(-similarities, limit - 1)[:limit]
+            else:
+                top = np.arange(len(similarities))
+            top = top[np.argsort(-similarities[top], kind="stable")]
+            return [self.memories[i] for i in indices[top]]
             
         except Exception as e:
             logger.error(f"Error getting relevant memories: {e}")
@@ -243,15 +1169,15 @@ class MemorySystem:
             List of recent memories
         """
         try:
+            # Memories are kept in insertion (timestamp) order, so the most
+            # recent ones are at the end
+            memories = reversed(self.memories)
+            
             # Filter by type if specified
-            memories = self.memories
             if memory_type:
-                memories = [m for m in memories if m["type"] == memory_type]
-            
-            # Sort by timestamp
-            memories.sort(key=lambda x: x["timestamp"], reverse=True)
+                memories = (m for m in memories if m["type"] == memory_type)
             
-            return memories[:limit]
+            return list(islice(memories, max(limit, 0)))
             
         except Exception as e:
             logger.error(f"Error getting recent memories: {e}")
@@ -265,7 +1191,8 @@ class MemorySystem:
         """Get memories for reflection.
         
         Args:
-            time_period: Optional time period (e.g., "1d", "1w", "1m")
+            time_period: Optional time period (e.g., "12h", "1d", "1w", "1m");
+                only memories from within it are returned
             limit: Maximum number of memories to return
             
         Returns:
@@ -275,13 +1202,16 @@ class MemorySystem:
             # Filter by time period if specified
             memories = self.memories
             if time_period:
-                # TODO: Implement time period filtering
-                pass
+                period = int(time_period[:-1] or 1) * _PERIOD_UNITS[time_period[-1]]
+                cutoff = np.datetime64(datetime.utcnow(), "ns") - period
+                # Timestamps are in insertion order, so the period is a suffix
+                start = int(np.searchsorted(
+                    self._times[:self._emb_count], cutoff.astype(np.int64), side="left"
+                ))
+                memories = memories[start:]
             
-            # Sort by timestamp
-            memories.sort(key=lambda x: x["timestamp"], reverse=True)
-            
-            return memories[:limit]
+            # Newest first, without sorting the insertion-ordered list
+            return list(islice(reversed(memories), max(limit, 0)))
             
         except Exception as e:
             logger.error(f"Error getting memories for reflection: {e}")
@@ -290,13 +1220,15 @@ class MemorySystem:
     async def import_memories(
         self,
         file_path: str,
-        memory_type: str = "semantic"
+        memory_type: str = "semantic",
+        batch_size: int = 64
     ) -> None:
         """Import memories from a file.
         
         Args:
             file_path: Path to the file
             memory_type: Type of memories to import
+            batch_size: Number of chunks per embedding request
         """
         try:
             with open(file_path, "r") as f:
@@ -305,18 +1237,59 @@ class MemorySystem:
             # Split content into chunks
             chunks = self._split_into_chunks(content)
             
-            # Add each chunk as a memory
-            for chunk in chunks:
-                await self.add_memory(
-                    content=chunk,
-                    memory_type=memory_type,
-                    metadata={"source": file_path}
-                )
+            # Embed the chunks in concurrent batches; the LLM's own semaphore
+            # caps how many requests are in flight
+            batches = await asyncio.gather(*(
+                self.llm.embed_batch(chunks[start:start + batch_size])
+                for start in range(0, len(chunks), batch_size)
+            ))
+            embeddings = [embedding for batch in batches for embedding in batch]
+            
+            # Add every chunk as a memory with a single append to disk
+            timestamp = datetime.utcnow().isoformat()
+            self._store(
+                [
+                    {
+                        "content": chunk,
+                        "type": memory_type,
+                        "timestamp": timestamp,
+                        "metadata": {"source": file_path}
+                    }
+                    for chunk in chunks
+                ],
+                embeddings
+            )
             
         except Exception as e:
             logger.error(f"Error importing memories: {e}")
             raise
     
+    async def export_memories(
+        self,
+        file_path: str,
+        include_embeddings: bool = False
+    ) -> None:
+        """Export all memories to a single portable JSON file.
+        
+        Args:
+            file_path: Path to the output file
+            include_embeddings: Whether to include each memory's (normalized)
+                embedding as a list of floats
+        """
+        try:
+            records = self.memories
+            if include_embeddings and self._emb_count:
+                records = [
+                    {**memory, "embedding": row.tolist()}
+                    for memory, row in zip(
+                        self.memories, self._dequantize(0, self._emb_count)
+                    )
+                ]
+            _write_json(Path(file_path), records)
+        except Exception as e:
+            logger.error(f"Error exporting memories: {e}")
+            raise
+    
     def _split_into_chunks(
         self,
         text: str,
@@ -331,24 +1304,23 @@ class MemorySystem:
         Returns:
             List of text chunks
         """
-        # Simple splitting by paragraphs
+        # Simple splitting by paragraphs; chunks are sliced straight out of
+        # `text` by character offset rather than re-joined
         paragraphs = text.split("\n\n")
-        chunks = []
-        current_chunk = []
-        current_size = 0
+        sizes = np.fromiter(
+            (len(p) for p in paragraphs), dtype=np.int64, count=len(paragraphs)
+        )
+        ends = np.cumsum(sizes)
+        # Each paragraph starts after the previous ones and their separators
+        starts = ends - sizes + 2 * np.arange(len(paragraphs))
         
-        for paragraph in paragraphs:
-            paragraph_size = len(paragraph)
-            if current_size + paragraph_size > max_chunk_size:
-                if current_chunk:
-                    chunks.append("\n\n".join(current_chunk))
-                current_chunk = [paragraph]
-                current_size = paragraph_size
-            else:
-                current_chunk.append(paragraph)
-                current_size += paragraph_size
-        
-        if current_chunk:
-            chunks.append("\n\n".join(current_chunk))
+        chunks = []
+        first = 0
+        while first < len(paragraphs):
+            # Take every following paragraph that fits, and at least one
+            budget = (ends[first] - sizes[first]) + max_chunk_size
+            last = max(first + 1, int(np.searchsorted(ends, budget, side="right")))
+            chunks.append(text[starts[first]:starts[last - 1] + sizes[last - 1]])
+            first = last
         
         return chunks 
\ No newline at end of file
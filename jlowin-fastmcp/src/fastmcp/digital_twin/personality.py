@@ -1,8 +1,11 @@
-from typing import Dict, List, Optional
-from pydantic import BaseModel, Field
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from pydantic import BaseModel, Field, PrivateAttr
 import numpy as np
 from datetime import datetime
 
+# Trait vector snapshots kept by Personality.evolve
+MAX_EVOLUTION_HISTORY = 1000
+
 class PersonalityTrait(BaseModel):
     """Represents a single personality trait with its value and evolution history."""
     name: str
@@ -21,31 +24,194 @@ class Personality(BaseModel):
     """Manages the digital twin's personality traits and their evolution."""
     traits: Dict[str, PersonalityTrait] = Field(default_factory=dict)
     last_updated: datetime = Field(default_factory=datetime.now)
+    # Trait values in `traits` order, kept in sync with the trait models. The
+    # array grows geometrically; the first `_n` slots are in use.
+    _vec: np.ndarray = PrivateAttr(default_factory=lambda: np.empty(0))
+    _n: int = PrivateAttr(default=0)
+    _trait_index: Dict[str, int] = PrivateAttr(default_factory=dict)
+    # Trait names in index order, as a tuple and as a unicode array for
+    # vectorized lookups, plus a set for overlap checks; all are rebuilt
+    # only when traits are added
+    _trait_names: Tuple[str, ...] = PrivateAttr(default=())
+    _trait_names_set: FrozenSet[str] = PrivateAttr(default=frozenset())
+    _names_np: np.ndarray = PrivateAttr(default_factory=lambda: np.empty(0, dtype=str))
+    # Permutation that sorts `_names_np`, for searchsorted lookups
+    _names_order: np.ndarray = PrivateAttr(
+        default_factory=lambda: np.empty(0, dtype=np.int64)
+    )
+    # Ring buffer of trait vectors, one row per evolve step, with their
+    # timestamps. Traits added after a row was written read as NaN in it.
+    _history: Optional[np.ndarray] = PrivateAttr(default=None)
+    _history_times: List[Optional[datetime]] = PrivateAttr(
+        default_factory=lambda: [None] * MAX_EVOLUTION_HISTORY
+    )
+    _history_pos: int = PrivateAttr(default=0)
+    _history_count: int = PrivateAttr(default=0)
+    # Bumped whenever a trait value changes
+    _version: int = PrivateAttr(default=0)
+    
+    def model_post_init(self, __context: Any) -> None:
+        """Build the trait vector from the traits passed at construction."""
+        traits = list(self.traits.values())
+        self._reserve(len(traits))
+        self._trait_index = {trait.name: i for i, trait in enumerate(traits)}
+        self._set_trait_names(tuple(self._trait_index))
+        self._vec[:len(traits)] = [trait.value for trait in traits]
+        self._n = len(traits)
+    
+    def _set_trait_names(self, names: Tuple[str, ...]) -> None:
+        """Rebuild the cached trait-name lookups for the given index order."""
+        self._trait_names = names
+        self._trait_names_set = frozenset(names)
+        self._names_np = np.array(names, dtype=str)
+        self._names_order = np.argsort(self._names_np)
+    
+    def _reserve(self, size: int) -> None:
+        """Make room for `size` traits in the value and history arrays."""
+        if size <= len(self._vec):
+            return
+        capacity = max(8, 2 * size)
+        vec = np.empty(capacity, dtype=np.float64)
+        vec[:self._n] = self._vec[:self._n]
+        self._vec = vec
+        if self._history is not None:
+            history = np.full((MAX_EVOLUTION_HISTORY, capacity), np.nan)
+            history[:, :self._n] = self._history[:, :self._n]
+            self._history = history
     
     def add_trait(self, name: str, initial_value: float = 0.5) -> None:
         """Add a new personality trait."""
-        self.traits[name] = PersonalityTrait(name=name, value=initial_value)
+        self.bulk_add(((name, initial_value),))
+    
+    def bulk_add(self, items: Iterable[Tuple[str, float]]) -> None:
+        """Add several traits, writing their values in one array update."""
+        traits = [PersonalityTrait(name=name, value=value) for name, value in items]
+        added = []
+        for trait in traits:
+            self.traits[trait.name] = trait
+            if trait.name not in self._trait_index:
+                self._trait_index[trait.name] = self._n + len(added)
+                added.append(trait.name)
+        if added:
+            self._reserve(self._n + len(added))
+            self._n += len(added)
+            self._set_trait_names((*self._trait_names, *added))
+        
+        indices = np.fromiter(
+            (self._trait_index[trait.name] for trait in traits),
+            dtype=np.int64,
+            count=len(traits)
+        )
+        self._vec[indices] = np.fromiter(
+            (trait.value for trait in traits), dtype=np.float64, count=len(traits)
+        )
+        self._version += 1
     
     def update_trait(self, name: str, new_value: float) -> None:
         """Update a specific trait's value."""
         if name in self.traits:
-            self.traits[name].update(new_value)
+            trait = self.traits[name]
+            trait.update(new_value)
+            self._vec[self._trait_index[name]] = trait.value
+            self._version += 1
             self.last_updated = datetime.now()
     
+    @property
+    def version(self) -> int:
+        """Counter that changes whenever any trait value changes."""
+        return self._version
+    
+    @property
+    def trait_names(self) -> Tuple[str, ...]:
+        """Trait names in the order of the trait vector."""
+        return self._trait_names
+    
+    @property
+    def trait_name_set(self) -> FrozenSet[str]:
+        """Trait names as a set, for overlap checks against a context."""
+        return self._trait_names_set
+    
+    def get_traits(self) -> Dict[str, float]:
+        """Get the current trait values by name."""
+        return dict(zip(self._trait_names, self._vec[:self._n].tolist()))
+    
     def get_trait_vector(self) -> np.ndarray:
-        """Get all trait values as a numpy array for ML processing."""
-        return np.array([trait.value for trait in self.traits.values()])
+        """Get all trait values as a numpy array for ML processing.
+        
+        This is a read-only view of the cached vector, so it reflects later
+        updates to existing traits.
+        """
+        vector = self._vec[:self._n]
+        vector.flags.writeable = False
+        return vector
     
     def evolve(self, interaction_context: Dict[str, float]) -> None:
         """
         Evolve personality based on interaction context.
-        This is a simple implementation that can be enhanced with more sophisticated ML models.
+        This is a simple implementation that can be enhanced with more
+        sophisticated ML models.
+        Context keys that are not traits are ignored; a trait value that is
+        not a finite number raises ValueError before any trait changes. An
+        interaction that moves no trait is not recorded in the history.
         """
-        for trait_name, trait in self.traits.items():
-            if trait_name in interaction_context:
-                # Simple weighted update
-                current_value = trait.value
-                context_value = interaction_context[trait_name]
-                # Gradually move towards the context value
-                new_value = current_value * 0.9 + context_value * 0.1
-                self.update_trait(trait_name, new_value) 
\ No newline at end of file
+        # Look the context keys up among the sorted trait names in one pass.
+        # Other keys are ignored, and traits missing from the context keep
+        # their current value.
+        keys = np.array(list(interaction_context), dtype=str)
+        if not len(keys) or not self._n:
+            return
+        sorted_names = self._names_np[self._names_order]
+        positions = np.minimum(np.searchsorted(sorted_names, keys), self._n - 1)
+        is_trait = sorted_names[positions] == keys
+        matched = self._names_order[positions[is_trait]]
+        if not len(matched):
+            return
+        # Only trait values are converted, so other keys may hold anything
+        items = list(interaction_context.values())
+        selected = [items[i] for i in np.flatnonzero(is_trait).tolist()]
+        values = np.array(selected, dtype=self._vec.dtype)
+        if not np.isfinite(values).all():
+            bad = keys[is_trait][~np.isfinite(values)].tolist()
+            raise ValueError(f"Non-finite values for traits {bad}")
+        
+        # Gradually move towards the context values: v += 0.1 * (c - v)
+        current = self._vec[matched]
+        updated = np.clip(current + 0.1 * (values - current), 0.0, 1.0)
+        if np.array_equal(updated, current):
+            return
+        self._vec[matched] = updated
+        self._version += 1
+        
+        timestamp = datetime.now()
+        for i, value in zip(matched.tolist(), updated.tolist()):
+            self.traits[self._trait_names[i]].value = value
+        self._record_history(timestamp)
+        self.last_updated = timestamp
+    
+    def _record_history(self, timestamp: datetime) -> None:
+        """Write the current trait vector into the history ring buffer."""
+        if self._history is None:
+            self._history = np.full((MAX_EVOLUTION_HISTORY, len(self._vec)), np.nan)
+        row = self._history_pos
+        self._history[row, :self._n] = self._vec[:self._n]
+        self._history[row, self._n:] = np.nan
+        self._history_times[row] = timestamp
+        self._history_pos = (row + 1) % MAX_EVOLUTION_HISTORY
+        self._history_count = min(self._history_count + 1, MAX_EVOLUTION_HISTORY)
+    
+    def get_evolution_history(self) -> List[Dict[str, Any]]:
+        """Get the trait values recorded at each evolve step, oldest first."""
+        names = self._trait_names
+        start = self._history_pos - self._history_count
+        rows = np.arange(start, self._history_pos) % MAX_EVOLUTION_HISTORY
+        return [
+            {
+                "timestamp": self._history_times[row],
+                "traits": {
+                    name: value
+                    for name, value in zip(names, self._history[row, :self._n].tolist())
+                    if value == value  # NaN for traits added after this step
+                }
+            }
+            for row in rows.tolist()
+        ] 
\ No newline at end of file
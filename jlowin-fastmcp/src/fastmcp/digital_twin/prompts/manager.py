@@ -1,14 +1,27 @@
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import ClassVar, Dict, Any, Optional, Tuple
 import yaml
 from string import Template
 import logging
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=64)
+def _format_traits(
+    traits: Tuple[Tuple[str, float], ...],
+    line_format: str,
+    separator: str
+) -> str:
+    """Join personality traits into a prompt string, cached by trait values."""
+    return separator.join(line_format.format(trait, value) for trait, value in traits)
+
 class PromptManager:
     """Manages prompt templates for the digital twin."""
     
+    # Templates loaded so far, keyed by resolved templates directory
+    _TEMPLATES: ClassVar[Dict[Path, Dict[str, Template]]] = {}
+    
     def __init__(self, templates_dir: Optional[str] = None):
         """Initialize the prompt manager.
         
@@ -22,17 +35,29 @@ class PromptManager:
         self.templates_dir = Path(templates_dir)
         self.templates: Dict[str, Template] = {}
         self._load_templates()
+        # Formatted prompts, keyed by template name and substitution values
+        self._format_cached = lru_cache(maxsize=256)(self._substitute)
     
     def _load_templates(self) -> None:
-        """Load all template files from the templates directory."""
-        for template_file in self.templates_dir.glob("*.txt"):
-            try:
-                with open(template_file, "r", encoding="utf-8") as f:
-                    template_name = template_file.stem
-                    self.templates[template_name] = Template(f.read())
-                logger.info(f"Loaded template: {template_name}")
-            except Exception as e:
-                logger.error(f"Error loading template {template_file}: {e}")
+        """Load all template files from the templates directory.
+        
+        Files are read once per directory and shared by later instances.
+        """
+        key = self.templates_dir.resolve()
+        cached = self._TEMPLATES.get(key)
+        if cached is None:
+            cached = {}
+            for template_file in self.templates_dir.glob("*.txt"):
+                try:
+                    with open(template_file, "r", encoding="utf-8") as f:
+                        template_name = template_file.stem
+                        cached[template_name] = Template(f.read())
+                    logger.info(f"Loaded template: {template_name}")
+                except Exception as e:
+                    logger.error(f"Error loading template {template_file}: {e}")
+            PromptManager._TEMPLATES[key] = cached
+        # Copy so templates added to one instance don't leak into others
+        self.templates.update(cached)
     
     def get_template(self, name: str) -> Optional[Template]:
         """Get a template by name.
@@ -63,12 +88,34 @@ class PromptManager:
             KeyError: If template not found
             ValueError: If template formatting fails
         """
+        try:
+            key = tuple(sorted(kwargs.items()))
+            hash(key)
+        except TypeError:
+            # Unhashable values can't be memoized
+            return self._substitute(template_name, tuple(kwargs.items()))
+        return self._format_cached(template_name, key)
+    
+    def _substitute(
+        self,
+        template_name: str,
+        items: Tuple[Tuple[str, Any], ...]
+    ) -> str:
+        """Substitute variables into a template.
+        
+        Args:
+            template_name: Name of the template to use
+            items: (name, value) pairs to substitute
+            
+        Returns:
+            Formatted prompt string
+        """
         template = self.get_template(template_name)
         if template is None:
             raise KeyError(f"Template not found: {template_name}")
         
         try:
-            return template.substitute(**kwargs)
+            return template.substitute(dict(items))
         except Exception as e:
             raise ValueError(f"Error formatting template {template_name}: {e}")
     
@@ -88,7 +135,7 @@ class PromptManager:
         Returns:
             Formatted personality prompt
         """
-        traits_str = "\n".join(f"- {trait}: {value:.2f}" for trait, value in traits.items())
+        traits_str = _format_traits(tuple(traits.items()), "- {}: {:.2f}", "\n")
         return self.format_prompt(
             "base_personality",
             name=name,
@@ -118,7 +165,7 @@ class PromptManager:
         Returns:
             Formatted reply prompt
         """
-        traits_str = ", ".join(f"{trait}: {value:.2f}" for trait, value in traits.items())
+        traits_str = _format_traits(tuple(traits.items()), "{}: {:.2f}", ", ")
         return self.format_prompt(
             "reply_simulation",
             name=name,
@@ -1,19 +1,48 @@
 from typing import Dict, List, Any, Optional
 from .llm.base import LLMConfig, LLMResponse
 from .llm.factory import LLMFactory
-from .llm.langchain_wrapper import DigitalTwinLLM, DigitalTwinEmbeddings
 from .prompts.manager import PromptManager
 import yaml
 import os
+import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Casual words replaced when the twin is more formal than the configured level
+_FORMAL_MAP = {
+    "gonna": "going to",
+    "wanna": "want to",
+    "yeah": "yes",
+    "nope": "no"
+}
+_FORMAL_RE = re.compile(r"\b(?:gonna|wanna|yeah|nope)\b")
+
+# Single periods (not ellipses) and runs of exclamation marks, both of which
+# become one "!" when the twin is more enthusiastic than the configured level
+_ENTHUSIASM_RE = re.compile(r"(?<!\.)\.(?!\.)|!+")
+
+# "SECTION_NAME:" header lines and "- item" bullet lines in LLM output
+_SECTION_HEADER_RE = re.compile(r"^[ \t]*(?!- )(\S[^\n]*?):[ \t\r]*$", re.MULTILINE)
+_BULLET_RE = re.compile(r"^[ \t]*- (.*?)[ \t\r]*$", re.MULTILINE)
+
+def parse_sections(text: str) -> Dict[str, List[str]]:
+    """Parse "SECTION:" headers and their "- item" bullets from LLM output."""
+    # split() yields [preamble, name1, body1, name2, body2, ...]
+    parts = _SECTION_HEADER_RE.split(text)
+    return {
+        name.lower(): _BULLET_RE.findall(body)
+        for name, body in zip(parts[1::2], parts[2::2])
+    }
+
 class ResponseGenerator:
     """Generates contextual responses based on personality and memories."""
     
     def __init__(self, config_path: str = "config.yaml"):
         """Initialize the response generator with configuration."""
+        # langchain is only needed once a generator is built
+        from .llm.langchain_wrapper import DigitalTwinLLM, DigitalTwinEmbeddings
+        
         self.config = self._load_config(config_path)
         self.llm = LLMFactory.create(LLMConfig(**self.config["llm"]))
         self.langchain_llm = DigitalTwinLLM(self.llm)
@@ -87,23 +116,22 @@ class ResponseGenerator:
         style_config = self.config["personality"]["response_style"]
         
         # Adjust formality based on conscientiousness
-        if personality_traits.get("conscientiousness", 0.5) > style_config["formality_level"]:
-            response = response.replace("gonna", "going to")
-            response = response.replace("wanna", "want to")
-            response = response.replace("yeah", "yes")
-            response = response.replace("nope", "no")
+        conscientiousness = personality_traits.get("conscientiousness", 0.5)
+        if conscientiousness > style_config["formality_level"]:
+            response = _FORMAL_RE.sub(lambda m: _FORMAL_MAP[m.group()], response)
         
         # Adjust enthusiasm based on extraversion
-        if personality_traits.get("extraversion", 0.5) > style_config["enthusiasm_level"]:
-            response = response.replace(".", "!")
-            response = response.replace("!", "!!")
+        extraversion = personality_traits.get("extraversion", 0.5)
+        if extraversion > style_config["enthusiasm_level"]:
+            response = _ENTHUSIASM_RE.sub("!", response)
             if not response.endswith("!"):
                 response += "!"
         
         # Adjust politeness based on agreeableness
-        if personality_traits.get("agreeableness", 0.5) > style_config["politeness_level"]:
+        agreeableness = personality_traits.get("agreeableness", 0.5)
+        if agreeableness > style_config["politeness_level"]:
             response = "I think " + response.lower()
-            if not any(word in response.lower() for word in ["please", "thank", "appreciate"]):
+            if not any(word in response for word in ["please", "thank", "appreciate"]):
                 response += " Thank you for asking!"
         
         return response
@@ -118,7 +146,8 @@ class ResponseGenerator:
         try:
             # Format current state
             personality_str = "\n".join(
-                f"- {trait}: {value:.2f}" for trait, value in current_personality.items()
+                f"- {trait}: {value:.2f}"
+                for trait, value in current_personality.items()
             )
             knowledge_str = "\n".join(
                 f"- {item['content']}" for item in current_knowledge
@@ -135,27 +164,7 @@ class ResponseGenerator:
             response = await self.llm.generate(prompt=formatted_prompt)
             
             # Parse the response into sections
-            sections = {}
-            current_section = None
-            current_items = []
-            
-            for line in response.text.split("\n"):
-                line = line.strip()
-                if not line:
-                    continue
-                
-                if line.endswith(":"):
-                    if current_section:
-                        sections[current_section] = current_items
-                    current_section = line[:-1].lower()
-                    current_items = []
-                elif line.startswith("- "):
-                    current_items.append(line[2:])
-            
-            if current_section:
-                sections[current_section] = current_items
-            
-            return sections
+            return parse_sections(response.text)
             
         except Exception as e:
             logger.error(f"Error analyzing interaction: {e}")
@@ -1,39 +1,67 @@
-from typing import Dict, Any, Tuple
-from transformers import pipeline
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
 import numpy as np
 
+if TYPE_CHECKING:
+    from transformers import Pipeline
+
+EMOTION_MODEL = "j-hartmann/emotion-english-distilroberta-base"
+
+@lru_cache(maxsize=None)
+def _get_pipeline(task: str, model: Optional[str] = None) -> "Pipeline":
+    """Load a pipeline once per process and share it across analyzers."""
+    # transformers and torch are slow to import, so defer them until needed
+    import torch
+    from transformers import pipeline
+    
+    kwargs: Dict[str, Any] = {}
+    if torch.cuda.is_available():
+        kwargs.update(device=0, torch_dtype=torch.float16)
+    return pipeline(task, model=model, **kwargs)
+
 class SentimentAnalyzer:
     """Analyzes sentiment and emotional context in text."""
     
-    def __init__(self):
-        self.sentiment_analyzer = pipeline("sentiment-analysis")
-        self.emotion_analyzer = pipeline("text-classification", 
-                                       model="j-hartmann/emotion-english-distilroberta-base")
+    def __init__(self, batch_size: int = 32):
+        self.batch_size = batch_size
+        self.sentiment_analyzer = _get_pipeline("sentiment-analysis")
+        self.emotion_analyzer = _get_pipeline("text-classification", EMOTION_MODEL)
     
     def analyze(self, text: str) -> Dict[str, Any]:
         """Analyze both sentiment and emotion in the text."""
-        # Get basic sentiment
-        sentiment = self.sentiment_analyzer(text)[0]
-        
-        # Get detailed emotion
-        emotion = self.emotion_analyzer(text)[0]
+        return self.analyze_batch([text])[0]
+    
+    def analyze_full(self, text: str) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Analyze the text and derive its emotional context from the same pass."""
+        analysis = self.analyze(text)
+        return analysis, self.get_emotional_context_from(analysis)
+    
+    def analyze_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Analyze sentiment and emotion for several texts in batched passes."""
+        sentiments = self.sentiment_analyzer(texts, batch_size=self.batch_size)
+        emotions = self.emotion_analyzer(texts, batch_size=self.batch_size)
         
         # Combine results
-        return {
-            "sentiment": {
-                "label": sentiment["label"],
-                "score": sentiment["score"]
-            },
-            "emotion": {
-                "label": emotion["label"],
-                "score": emotion["score"]
+        return [
+            {
+                "sentiment": {
+                    "label": sentiment["label"],
+                    "score": sentiment["score"]
+                },
+                "emotion": {
+                    "label": emotion["label"],
+                    "score": emotion["score"]
+                }
             }
-        }
+            for sentiment, emotion in zip(sentiments, emotions)
+        ]
     
     def get_emotional_context(self, text: str) -> Dict[str, float]:
         """Convert sentiment and emotion analysis into personality-relevant context."""
-        analysis = self.analyze(text)
-        
+        return self.analyze_full(text)[1]
+    
+    def get_emotional_context_from(self, analysis: Dict[str, Any]) -> Dict[str, float]:
+        """Convert an existing `analyze` result into personality-relevant context."""
         # Map sentiment and emotion to personality traits
         context = {
             "neuroticism": 0.5,  # Default value
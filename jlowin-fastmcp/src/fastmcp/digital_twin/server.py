@@ -1,61 +1,126 @@
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any, Tuple, TypeVar
 from fastmcp import FastMCP
 from .personality import Personality
 from .memory import MemoryManager
 from .response_generator import ResponseGenerator
 from .sentiment import SentimentAnalyzer
-import json
-from datetime import datetime
+from .llm.base import run_sync
+import asyncio
+import copy
+import functools
+import hashlib
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+T = TypeVar("T")
+
+# Interactions whose responses are kept for repeated prompts
+INTERACTION_CACHE_SIZE = 256
+
+# Big Five traits a twin starts with when no initial traits are given
+_DEFAULT_TRAITS: Tuple[Tuple[str, float], ...] = (
+    ("openness", 0.5),
+    ("conscientiousness", 0.5),
+    ("extraversion", 0.5),
+    ("agreeableness", 0.5),
+    ("neuroticism", 0.5),
+)
+
+def _serialize_tool_result(data: Any) -> str:
+    """Serialize an MCP tool result with orjson, which handles datetimes natively."""
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    return orjson.dumps(data, option=option).decode()
 
 class DigitalTwinServer:
-    """A self-evolving digital twin MCP server that simulates user behavior and responses."""
+    """A self-evolving digital twin MCP server that simulates user behavior."""
     
     def __init__(self, name: str, initial_traits: Optional[Dict[str, float]] = None):
         self.name = name
         self.personality = Personality()
-        self.memory_manager = MemoryManager()
         self.response_generator = ResponseGenerator()
+        self.memory_manager = MemoryManager(embedder=self._create_embedder())
         self.sentiment_analyzer = SentimentAnalyzer()
-        self.mcp = FastMCP(f"{name}'s Digital Twin")
+        # Repeated prompts reuse their analysis instead of rerunning the models
+        self._analyze_cached = functools.lru_cache(maxsize=1024)(
+            self.sentiment_analyzer.analyze_full
+        )
+        # Without orjson, FastMCP's default serializer is used
+        serializer = (
+            {"tool_serializer": _serialize_tool_result} if orjson is not None else {}
+        )
+        self.mcp = FastMCP(f"{name}'s Digital Twin", **serializer)
+        # Model inference and database calls run here, off the event loop
+        self._pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+        # Interaction digest -> (response, (personality version, memory
+        # generation) a repeat of the interaction may reuse it under)
+        self._interaction_cache: "OrderedDict[bytes, Tuple[str, Tuple[int, int]]]" = (
+            OrderedDict()
+        )
         
         # Initialize with default traits if none provided
-        if initial_traits is None:
-            initial_traits = {
-                "openness": 0.5,
-                "conscientiousness": 0.5,
-                "extraversion": 0.5,
-                "agreeableness": 0.5,
-                "neuroticism": 0.5
-            }
-        
-        for trait_name, value in initial_traits.items():
-            self.personality.add_trait(trait_name, value)
+        self.personality.bulk_add(
+            _DEFAULT_TRAITS if initial_traits is None else initial_traits.items()
+        )
         
         self._setup_mcp_tools()
     
+    def _create_embedder(self):
+        """Load the sentence-transformer model used for memory search."""
+        # Imported here since sentence-transformers pulls in torch
+        from sentence_transformers import SentenceTransformer
+        
+        memory_config = self.response_generator.config.get("memory", {})
+        model = memory_config.get("embedding_model", "all-MiniLM-L6-v2")
+        return SentenceTransformer(model)
+    
+    async def _run_blocking(
+        self, func: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> T:
+        """Run a blocking call in the server's thread pool."""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        return await loop.run_in_executor(self._pool, call)
+    
+    async def _analyze(self, text: str) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Analyze text through the shared cache, returning copies to modify."""
+        analysis = await self._run_blocking(self._analyze_cached, text)
+        return copy.deepcopy(analysis)
+    
     def _setup_mcp_tools(self):
         """Set up MCP tools for the digital twin."""
         
         @self.mcp.tool()
         def get_personality() -> Dict[str, float]:
             """Get the current personality traits."""
-            return {name: trait.value for name, trait in self.personality.traits.items()}
+            return self.personality.get_traits()
         
         @self.mcp.tool()
-        def add_memory(content: str, context: Dict[str, Any], 
-                      importance: int = 50, category: str = "general") -> None:
+        async def add_memory(content: str, context: Dict[str, Any], 
+                            importance: int = 50, category: str = "general") -> None:
             """Add a new memory to the digital twin."""
-            self.memory_manager.add_memory(content, context, importance, category)
+            await self._run_blocking(
+                self.memory_manager.add_memory, content, context, importance, category
+            )
         
         @self.mcp.tool()
-        def get_recent_memories(limit: int = 10) -> List[Dict[str, Any]]:
+        async def get_recent_memories(limit: int = 10) -> List[Dict[str, Any]]:
             """Get the most recent memories."""
-            return self.memory_manager.get_recent_memories(limit)
+            return await self._run_blocking(
+                self.memory_manager.get_recent_memories, limit
+            )
         
         @self.mcp.tool()
-        def search_memories(query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        async def search_memories(query: str, limit: int = 5) -> List[Dict[str, Any]]:
             """Search memories based on content."""
-            return self.memory_manager.search_memories(query, limit)
+            return await self._run_blocking(
+                self.memory_manager.search_memories, query, limit
+            )
         
         @self.mcp.tool()
         def update_personality(trait_updates: Dict[str, float]) -> None:
@@ -63,52 +128,98 @@ class DigitalTwinServer:
             self.personality.evolve(trait_updates)
         
         @self.mcp.tool()
-        def analyze_sentiment(text: str) -> Dict[str, Any]:
+        async def analyze_sentiment(text: str) -> Dict[str, Any]:
             """Analyze the sentiment and emotion in text."""
-            return self.sentiment_analyzer.analyze(text)
+            analysis, _ = await self._analyze(text)
+            return analysis
     
     def process_interaction(self, prompt: str, context: Dict[str, Any]) -> str:
         """
         Process an interaction with the digital twin.
-        This is where the personality and memory systems work together to generate a response.
+        Synchronous wrapper around `aprocess_interaction` for non-async callers.
         """
-        # Analyze sentiment and get emotional context
-        sentiment_analysis = self.sentiment_analyzer.analyze(prompt)
-        emotional_context = self.sentiment_analyzer.get_emotional_context(prompt)
+        return run_sync(self.aprocess_interaction(prompt, context))
+    
+    async def aprocess_interaction(self, prompt: str, context: Dict[str, Any]) -> str:
+        """
+        Process an interaction with the digital twin.
+        This is where the personality and memory systems work together to
+        generate a response.
+        """
+        sentiment_analysis, emotional_context = await self._analyze(prompt)
         
-        # Merge emotional context with provided context
+        # Emotional context overrides the provided context; merged once and
+        # shared by the steps below
         full_context = {**context, **emotional_context}
         
-        # Store the interaction in memory with sentiment analysis
-        self.memory_manager.add_memory(
-            content=prompt,
-            context={
-                **full_context,
-                "sentiment": sentiment_analysis
-            },
-            importance=70,  # High importance for direct interactions
-            category="interaction"
-        )
+        # Update personality based on interaction context; traits the context
+        # does not mention are left alone rather than pulled towards 0.5
+        overlap = self.personality.trait_name_set.intersection(full_context)
+        if overlap:
+            self.personality.evolve({trait: full_context[trait] for trait in overlap})
         
-        # Update personality based on interaction context
-        personality_context = {
-            trait: full_context.get(trait, 0.5)
-            for trait in self.personality.traits.keys()
-        }
-        self.personality.evolve(personality_context)
-        
-        # Get relevant memories for context
-        relevant_memories = self.memory_manager.search_memories(prompt, limit=3)
-        
-        # Generate response using personality traits and memories
-        response = self.response_generator.generate_response(
-            prompt=prompt,
-            personality_traits=self.personality.traits,
-            relevant_memories=relevant_memories
-        )
+        # A repeated interaction reuses its cached response while neither the
+        # personality nor the stored memories have changed since it was made
+        key = hashlib.blake2b(
+            repr((prompt, sorted(context.items()))).encode(), digest_size=16
+        ).digest()
+        generation = self.memory_manager.generation
+        cached = self._interaction_cache.get(key)
+        if cached is not None and cached[1] != (self.personality.version, generation):
+            cached = None
+        
+        if cached is None:
+            # The search sees memories from before this interaction
+            relevant_memories = await self._run_blocking(
+                self.memory_manager.search_memories, prompt, limit=3
+            )
+        
+        # Store the interaction in memory with sentiment analysis, building
+        # the stored context directly rather than going through add_memory
+        await self._run_blocking(self.memory_manager.store_record, {
+            "content": prompt,
+            "context": {**full_context, "sentiment": sentiment_analysis},
+            "importance": 70,  # High importance for direct interactions
+            "category": "interaction"
+        })
+        
+        if cached is not None:
+            response, (version, _) = cached
+        else:
+            # Generate response using personality traits and memories
+            version = self.personality.version
+            response = await self.response_generator.generate_response(
+                prompt=prompt,
+                personality_traits=self.personality.get_traits(),
+                relevant_memories=relevant_memories,
+                context={"name": self.name, **full_context}
+            )
+        
+        # A repeat finds this interaction's own memory stored, which does not
+        # make the response stale; anything else stored meanwhile does
+        if self.memory_manager.generation == generation + 1:
+            self._interaction_cache[key] = (response, (version, generation + 1))
+            self._interaction_cache.move_to_end(key)
+            if len(self._interaction_cache) > INTERACTION_CACHE_SIZE:
+                self._interaction_cache.popitem(last=False)
+        else:
+            self._interaction_cache.pop(key, None)
         
         return response
     
     def run(self, host: str = "localhost", port: int = 8000):
         """Run the digital twin MCP server."""
-        self.mcp.run(host=host, port=port) 
\ No newline at end of file
+        try:
+            self.mcp.run(host=host, port=port)
+        finally:
+            self.close()
+    
+    def close(self) -> None:
+        """Shut down the worker threads used for blocking calls."""
+        self._pool.shutdown(wait=True)
+    
+    def __enter__(self) -> "DigitalTwinServer":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close() 
\ No newline at end of file
@@ -0,0 +1,177 @@
+import asyncio
+import random
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pytest
+
+from fastmcp.digital_twin import memory
+from fastmcp.digital_twin.llm.base import BaseLLM, LLMConfig, LLMResponse
+from fastmcp.digital_twin.memory import MemoryManager, MemorySystem
+
+
+class FakeLLM(BaseLLM):
+    """LLM stub with deterministic 8-dim embeddings."""
+
+    def __init__(self):
+        super().__init__(LLMConfig(provider="fake", model="fake"))
+
+    async def generate(
+        self, prompt: str, context: Optional[Dict[str, Any]] = None, **kwargs
+    ) -> LLMResponse:
+        return LLMResponse(prompt, None, {})
+
+    async def embed(self, text: str) -> List[float]:
+        rng = random.Random(text)
+        return [rng.uniform(-1, 1) for _ in range(8)]
+
+    def get_token_count(self, text: str) -> int:
+        return len(text.split())
+
+
+class ConstantEmbedder:
+    """Embedder that maps every text to the same vector, so only BM25 ranks."""
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        return np.ones((len(texts), 4), dtype=np.float32) / 2
+
+
+def join_chunks(text: str, max_chunk_size: int = 1000) -> List[str]:
+    """The original paragraph-joining chunker, kept as the reference."""
+    chunks = []
+    current_chunk = []
+    current_size = 0
+    for paragraph in text.split("\n\n"):
+        paragraph_size = len(paragraph)
+        if current_size + paragraph_size > max_chunk_size:
+            if current_chunk:
+                chunks.append("\n\n".join(current_chunk))
+            current_chunk = [paragraph]
+            current_size = paragraph_size
+        else:
+            current_chunk.append(paragraph)
+            current_size += paragraph_size
+    if current_chunk:
+        chunks.append("\n\n".join(current_chunk))
+    return chunks
+
+
+@pytest.fixture
+def memory_system(tmp_path) -> MemorySystem:
+    return MemorySystem(FakeLLM(), memory_dir=str(tmp_path))
+
+
+def store(memory_system: MemorySystem, content: str, timestamp: Any) -> None:
+    """Store an episodic memory with an explicit timestamp."""
+    embedding = asyncio.run(memory_system.llm.embed(content))
+    memory = {
+        "content": content, "type": "episodic", "timestamp": timestamp, "metadata": {}
+    }
+    memory_system._store([memory], [embedding])
+
+
+def test_hybrid_search_ranks_exact_name_first():
+    manager = MemoryManager("sqlite://", embedder=ConstantEmbedder())
+    manager.add_memories([
+        {"content": "Lunch with the team at the usual place", "context": {}},
+        {"content": "Call with Zanzibar about the launch", "context": {}},
+        {"content": "Team call about the launch plan", "context": {}},
+    ])
+
+    results = manager.search_memories("Zanzibar", limit=3)
+
+    assert results[0]["content"] == "Call with Zanzibar about the launch"
+
+
+@pytest.mark.skipif(memory.njit is None, reason="numba is not installed")
+def test_bm25_kernel_compiled_once():
+    manager = MemoryManager("sqlite://", embedder=ConstantEmbedder())
+    manager.add_memories([
+        {"content": f"hiking note {i}", "context": {}} for i in range(3)
+    ])
+
+    manager.search_memories("hiking note", limit=3)
+
+    assert len(memory._bm25_accumulate.signatures) == 1
+
+
+def test_indexes_added_to_existing_table(tmp_path):
+    path = tmp_path / "old.db"
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE memories (id INTEGER PRIMARY KEY, timestamp DATETIME,"
+            " content VARCHAR, context JSON, importance INTEGER, category VARCHAR,"
+            " embedding BLOB)"
+        )
+
+    MemoryManager(f"sqlite:///{path}")
+
+    with sqlite3.connect(path) as connection:
+        indexes = {
+            name for (name,) in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+    assert {"ix_memories_timestamp", "ix_memories_importance"} <= indexes
+
+
+def test_generation_counts_writes():
+    manager = MemoryManager("sqlite://")
+    manager.add_memory("first", {})
+    manager.add_memories([{"content": "second", "context": {}}])
+    memory_id = manager.store_record({"content": "third", "context": {}})
+    manager.update_memory_importance(memory_id, 90)
+    manager.search_memories("first")
+
+    assert manager.generation == 4
+
+
+def test_reflection_period_excludes_older_memories(memory_system):
+    store(memory_system, "old", (datetime.utcnow() - timedelta(days=3)).isoformat())
+    asyncio.run(memory_system.add_memory("new", "episodic"))
+
+    recent = asyncio.run(memory_system.get_memories_for_reflection("1d"))
+    everything = asyncio.run(memory_system.get_memories_for_reflection())
+
+    assert [m["content"] for m in recent] == ["new"]
+    assert [m["content"] for m in everything] == ["new", "old"]
+
+
+@pytest.mark.parametrize("timestamp", [None, "", "not a date"])
+def test_reflection_period_dates_invalid_timestamps_as_previous(
+    memory_system, timestamp
+):
+    store(memory_system, "old", (datetime.utcnow() - timedelta(days=3)).isoformat())
+    store(memory_system, "undated", timestamp)
+    asyncio.run(memory_system.add_memory("new", "episodic"))
+
+    recent = asyncio.run(memory_system.get_memories_for_reflection("1d"))
+
+    assert [m["content"] for m in recent] == ["new"]
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["", "one paragraph", "a\n\nb", "\n\n\n\n", "x" * 2500, "a\n\n\n\nb\n\n"],
+)
+@pytest.mark.parametrize("max_chunk_size", [0, 1, 5, 1000])
+def test_split_into_chunks_matches_join(memory_system, text, max_chunk_size):
+    assert memory_system._split_into_chunks(text, max_chunk_size) == join_chunks(
+        text, max_chunk_size
+    )
+
+
+def test_split_into_chunks_matches_join_random(memory_system):
+    rng = random.Random(0)
+    for _ in range(200):
+        paragraphs = [
+            "".join(rng.choice("ab \n") for _ in range(rng.randrange(40)))
+            for _ in range(rng.randrange(1, 30))
+        ]
+        text = "\n\n".join(paragraphs)
+        size = rng.randrange(100)
+        assert memory_system._split_into_chunks(text, size) == join_chunks(
+            text, size
+        )
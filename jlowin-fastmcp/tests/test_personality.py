@@ -0,0 +1,59 @@
+import math
+
+import pytest
+
+from fastmcp.digital_twin.personality import Personality
+
+
+@pytest.fixture
+def personality() -> Personality:
+    personality = Personality()
+    personality.bulk_add([("openness", 0.5), ("empathy", 0.5)])
+    return personality
+
+
+def test_evolve_ignores_non_trait_keys(personality):
+    version = personality.version
+    personality.evolve({"openness": 1.0, "topic": "weather", "mood": None})
+
+    traits = personality.get_traits()
+    assert math.isclose(traits["openness"], 0.55)
+    assert traits["empathy"] == 0.5
+    assert "topic" not in traits
+    assert personality.version == version + 1
+
+
+@pytest.mark.parametrize("value", ["high", None, float("nan"), float("inf")])
+def test_evolve_rejects_non_numeric_trait_values(personality, value):
+    version = personality.version
+    with pytest.raises(ValueError):
+        personality.evolve({"openness": 1.0, "empathy": value})
+
+    assert personality.get_traits() == {"openness": 0.5, "empathy": 0.5}
+    assert personality.version == version
+    assert personality.get_evolution_history() == []
+
+
+def test_evolve_without_trait_keys_records_nothing(personality):
+    version = personality.version
+    last_updated = personality.last_updated
+    personality.evolve({"topic": "weather"})
+
+    assert personality.get_traits() == {"openness": 0.5, "empathy": 0.5}
+    assert personality.version == version
+    assert personality.last_updated == last_updated
+    assert personality.get_evolution_history() == []
+
+
+def test_evolve_records_history_only_when_a_trait_moves(personality):
+    personality.update_trait("openness", 1.0)
+    version = personality.version
+    personality.evolve({"openness": 1.0})
+
+    assert personality.version == version
+    assert personality.get_evolution_history() == []
+
+    personality.evolve({"openness": 0.0})
+
+    assert personality.version == version + 1
+    assert len(personality.get_evolution_history()) == 1